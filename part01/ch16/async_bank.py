@@ -0,0 +1,100 @@
+"""AsyncBank - 비동기 환율 공급자에서 환율을 받아 오는 Bank
+
+같은 환율을 동시에 묻는 코루틴들은 공급자 호출 하나를 함께 기다리고,
+받아 온 환율은 ttl초 동안 캐시한다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+
+from part01.ch16.currency import (
+    ROUND_FLOOR,
+    ROUNDING_MODES,
+    Expression,
+    Money,
+    collect_buckets,
+    convert_buckets,
+)
+
+
+def _check_rate(rate: int) -> None:
+    # Bank.add_rate와 같다 - 0이나 음수 환율은 환산을 0으로 나누거나 부호를 뒤집는다
+    if rate <= 0:
+        raise ValueError(f"환율은 양수여야 합니다: {rate}")
+
+
+class RateProvider(ABC):
+    """비동기 환율 공급자 인터페이스 (시세 서버 등)"""
+
+    @abstractmethod
+    async def fetch(self, from_currency: str, to_currency: str) -> int:
+        """from_currency → to_currency 환율 - 없으면 KeyError"""
+        pass
+
+
+class AsyncBank:
+    """await bank.reduce(expr, to)로 쓰는 Bank - 모르는 환율은 공급자에서 받아 온다"""
+
+    def __init__(
+        self,
+        provider: RateProvider,
+        ttl: float = 60.0,
+        rounding: str = ROUND_FLOOR,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rounding not in ROUNDING_MODES:
+            raise ValueError(f"알 수 없는 반올림 모드입니다: {rounding}")
+        self.rounding = rounding
+        self._provider = provider
+        self._ttl = ttl
+        self._clock = clock
+        # 환율 캐시 {(from, to): (rate, 만료 시각)}
+        self._cache: dict[tuple[str, str], tuple[int, float]] = {}
+        # 진행 중인 조회 {(from, to): Future} - 같은 쌍의 요청을 하나로 합친다
+        self._inflight: dict[tuple[str, str], asyncio.Future[int]] = {}
+
+    def add_rate(self, from_currency: str, to_currency: str, rate: int) -> None:
+        """공급자를 거치지 않고 환율을 캐시에 넣는다 (ttl 동안 유효)"""
+        _check_rate(rate)
+        expires = self._clock() + self._ttl
+        self._cache[(from_currency, to_currency)] = (rate, expires)
+
+    async def rate(self, from_currency: str, to_currency: str) -> int:
+        if from_currency == to_currency:
+            return 1
+        key = (from_currency, to_currency)
+        cached = self._cache.get(key)
+        if cached is not None and cached[1] > self._clock():
+            return cached[0]
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(key))
+            self._inflight[key] = future
+        # 기다리던 쪽이 취소되어도 함께 기다리는 다른 코루틴의 조회는 계속된다
+        return await asyncio.shield(future)
+
+    async def _fetch(self, key: tuple[str, str]) -> int:
+        try:
+            rate = await self._provider.fetch(*key)
+            # 잘못된 환율은 캐시하지 않는다 - 기다리던 코루틴은 모두 ValueError를 받는다
+            _check_rate(rate)
+            self._cache[key] = (rate, self._clock() + self._ttl)
+            return rate
+        finally:
+            del self._inflight[key]
+
+    async def reduce(self, source: Expression, to_currency: str) -> Money:
+        """트리를 한 번 순회해 필요한 환율을 동시에 받아 온 뒤 환산한다"""
+        buckets = collect_buckets(source)
+        currencies = list(buckets)
+        rates = await asyncio.gather(
+            *(self.rate(currency, to_currency) for currency in currencies)
+        )
+        amount = convert_buckets(
+            buckets, dict(zip(currencies, rates, strict=True)), self.rounding
+        )
+        return Money.of(amount, to_currency)
@@ -0,0 +1,214 @@
+"""MoneyBatch - 열(column) 지향 Money 묶음
+
+금액은 연속된 int64 버퍼(array "q")에, 통화는 코드 표의 인덱스 열(array "I")에
+담는다. Money 객체를 행마다 만들지 않고 times/reduce를 한 번의 호출로 처리한다.
+
+int64를 넘는 금액은 그 행만 정확한 정수로 따로 담는다(_bigs, 행 번호 -> 금액).
+금액 열의 그 칸은 0으로 두므로 합계와 환산은 int64 열을 그대로 쓰고 큰 행만 보정한다.
+times는 열의 최댓값/최솟값으로 곱이 int64에 들어가는지 한 번에 확인하고, 넘칠 때만
+행마다 확인하는 느린 경로로 간다.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import Counter
+from collections.abc import Iterable, Iterator
+
+from part01.ch16.currency import (
+    ROUND_FLOOR,
+    Bank,
+    Buckets,
+    Expression,
+    Money,
+    Sum,
+    divide,
+)
+
+INT64_MIN = -(2**63)
+INT64_MAX = 2**63 - 1
+
+
+def _pack(values: Iterable[int]) -> tuple[array, dict[int, int]]:
+    """int64 금액 열과 int64를 넘는 행의 {행: 금액}"""
+    values = values if isinstance(values, (list, array)) else list(values)
+    try:
+        return array("q", values), {}
+    except OverflowError:
+        pass
+    amounts = array("q", bytes(8 * len(values)))
+    bigs = {}
+    for row, amount in enumerate(values):
+        if INT64_MIN <= amount <= INT64_MAX:
+            amounts[row] = amount
+        else:
+            bigs[row] = amount
+    return amounts, bigs
+
+
+class MoneyBatch(Expression):
+    """금액 열과 통화 코드 열로 이루어진 Expression"""
+
+    def __init__(self, amounts: Iterable[int], currencies: Iterable[str]) -> None:
+        self._amounts, self._bigs = _pack(amounts)
+        self._codes: list[str] = []
+        self._ids = array("I")
+        index: dict[str, int] = {}
+        for currency in currencies:
+            currency_id = index.get(currency)
+            if currency_id is None:
+                currency_id = index[currency] = len(self._codes)
+                self._codes.append(currency)
+            self._ids.append(currency_id)
+        if len(self._ids) != len(self._amounts):
+            raise ValueError("금액과 통화의 개수가 다릅니다")
+
+    @classmethod
+    def _from_columns(
+        cls,
+        amounts: array,
+        ids: array,
+        codes: list[str],
+        bigs: dict[int, int] | None = None,
+    ) -> MoneyBatch:
+        """열을 복사하지 않고 MoneyBatch를 만든다"""
+        batch = cls.__new__(cls)
+        batch._amounts = amounts
+        batch._ids = ids
+        batch._codes = codes
+        batch._bigs = bigs or {}
+        return batch
+
+    # 팩토리 메서드
+    @classmethod
+    def of(cls, amounts: Iterable[int], currency: str) -> MoneyBatch:
+        """한 가지 통화로 이루어진 MoneyBatch"""
+        values, bigs = _pack(amounts)
+        ids = array("I", [0]) * len(values)
+        return cls._from_columns(values, ids, [currency], bigs)
+
+    @classmethod
+    def from_money(cls, moneys: Iterable[Money]) -> MoneyBatch:
+        rows = [(money._amount, money._currency) for money in moneys]
+        return cls((amount for amount, _ in rows), (currency for _, currency in rows))
+
+    def __len__(self) -> int:
+        return len(self._amounts)
+
+    def __getitem__(self, index: int) -> Money:
+        currency = self._codes[self._ids[index]]
+        if self._bigs:
+            index = range(len(self))[index]
+            if index in self._bigs:
+                return Money.of(self._bigs[index], currency)
+        return Money.of(self._amounts[index], currency)
+
+    def __iter__(self) -> Iterator[Money]:
+        codes = self._codes
+        for amount, currency_id in zip(self._exact(), self._ids, strict=True):
+            yield Money.of(amount, codes[currency_id])
+
+    def _exact(self) -> array | list[int]:
+        """행마다 정확한 금액 - 큰 행이 없으면 int64 열 그대로"""
+        if not self._bigs:
+            return self._amounts
+        amounts = self._amounts.tolist()
+        for row, amount in self._bigs.items():
+            amounts[row] = amount
+        return amounts
+
+    def __repr__(self) -> str:
+        return f"MoneyBatch({len(self)} rows, {self._codes})"
+
+    def currencies(self) -> list[str]:
+        return list(self._codes)
+
+    def totals(self) -> dict[str, int]:
+        """통화별 금액 합계 (환산 전)"""
+        if len(self._codes) == 1:
+            return {self._codes[0]: sum(self._amounts) + sum(self._bigs.values())}
+        sums = [0] * len(self._codes)
+        for amount, currency_id in zip(self._amounts, self._ids, strict=True):
+            sums[currency_id] += amount
+        for row, amount in self._bigs.items():
+            sums[self._ids[row]] += amount
+        return dict(zip(self._codes, sums, strict=True))
+
+    def times(self, multiplier: int) -> Expression:
+        values = self._amounts
+        if not self._bigs and values:
+            # 가장 큰 절댓값에 곱해도 int64 안이면 모든 행이 안전하다
+            bound = max(-min(values), max(values)) * abs(multiplier)
+            if bound <= INT64_MAX:
+                amounts = array("q", [amount * multiplier for amount in values])
+                return MoneyBatch._from_columns(amounts, self._ids, self._codes)
+        amounts, bigs = _pack([amount * multiplier for amount in self._exact()])
+        return MoneyBatch._from_columns(amounts, self._ids, self._codes, bigs)
+
+    def plus(self, addend: Expression) -> Expression:
+        if not isinstance(addend, MoneyBatch):
+            return Sum(self, addend)
+        # 같은 열 구조끼리는 이어 붙이기만 하면 된다
+        codes = list(self._codes)
+        index = {code: i for i, code in enumerate(codes)}
+        remap = []
+        for code in addend._codes:
+            if code not in index:
+                index[code] = len(codes)
+                codes.append(code)
+            remap.append(index[code])
+        ids = array("I", self._ids)
+        ids.extend(array("I", [remap[i] for i in addend._ids]))
+        amounts = array("q", self._amounts)
+        amounts.extend(addend._amounts)
+        bigs = dict(self._bigs)
+        offset = len(self)
+        for row, amount in addend._bigs.items():
+            bigs[offset + row] = amount
+        return MoneyBatch._from_columns(amounts, ids, codes, bigs)
+
+    def reduce(self, bank: Bank, to_currency: str) -> Money:
+        return Money.of(self._reduce_amount(bank, to_currency), to_currency)
+
+    def _reduce_amount(self, bank: Bank, to_currency: str) -> int:
+        rates = [bank.rate(code, to_currency) for code in self._codes]
+        amounts = self._amounts
+        if all(rate == 1 for rate in rates):
+            total = sum(amounts)
+        elif bank.rounding != ROUND_FLOOR:
+            rounding = bank.rounding
+            total = sum(
+                divide(amount, rates[currency_id], rounding)
+                for amount, currency_id in zip(amounts, self._ids, strict=True)
+            )
+        elif len(rates) == 1:
+            rate = rates[0]
+            total = sum(amount // rate for amount in amounts)
+        else:
+            total = sum(
+                amount // rates[currency_id]
+                for amount, currency_id in zip(amounts, self._ids, strict=True)
+            )
+        # 큰 행은 금액 열에서 0으로 셈했으므로 정확한 금액으로 따로 더한다
+        for row, amount in self._bigs.items():
+            total += divide(amount, rates[self._ids[row]], bank.rounding)
+        return total
+
+    def _accumulate(self, buckets: Buckets, stack: list[Expression]) -> None:
+        counters = []
+        for code in self._codes:
+            bucket = buckets.get(code)
+            if bucket is None:
+                bucket = buckets[code] = Counter()
+            counters.append(bucket)
+        if len(counters) == 1:
+            counters[0].update(self._amounts)
+        else:
+            for amount, currency_id in zip(self._amounts, self._ids, strict=True):
+                counters[currency_id][amount] += 1
+        for row, amount in self._bigs.items():
+            counter = counters[self._ids[row]]
+            counter[0] -= 1
+            if not counter[0]:
+                del counter[0]
+            counter[amount] += 1
@@ -0,0 +1 @@
+# bench 패키지 - Money/Expression/Bank 성능 측정
@@ -0,0 +1,46 @@
+"""벤치마크 실행
+
+python -m part01.ch16.bench run -o bench.json       # 전체 측정
+python -m part01.ch16.bench run --quick              # 큰 크기 제외
+python -m part01.ch16.bench compare base.json bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+from part01.ch16.bench.suite import compare, load, run_suite, save
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m part01.ch16.bench")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="벤치마크를 재서 JSON으로 저장")
+    run.add_argument("-o", "--output", default="bench.json")
+    run.add_argument("--quick", action="store_true")
+    run.add_argument("--repeat", type=int, default=5)
+    run.add_argument("-k", dest="only", help="이름에 이 문자열이 든 케이스만")
+
+    diff = commands.add_parser("compare", help="두 결과를 비교해 느려진 케이스 출력")
+    diff.add_argument("base")
+    diff.add_argument("head")
+    diff.add_argument("--threshold", type=float, default=0.10)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        report = run_suite(quick=args.quick, repeat=args.repeat, only=args.only)
+        save(report, args.output)
+        for name, result in report["results"].items():
+            print(f"{name:<24}{result['ops_per_sec']:>16,.0f} ops/s")
+        return 0
+
+    regressions = compare(load(args.base), load(args.head), args.threshold)
+    for name, before, after in regressions:
+        print(f"{name:<24}{before:>16,.0f} -> {after:>16,.0f} ops/s")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
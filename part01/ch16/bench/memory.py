@@ -0,0 +1,83 @@
+"""인스턴스당 메모리 측정 - __slots__ 적용 전후 비교
+
+실행: python -m part01.ch16.bench.memory
+"""
+
+from __future__ import annotations
+
+import gc
+import tracemalloc
+from collections.abc import Callable
+
+from part01 import currency as part01_currency
+from part01.ch16.currency import Money, Pair, Sum
+
+
+# __slots__ 적용 전과 같은 모양의 클래스 - 비교 기준
+class DictMoney:
+    def __init__(self, amount: int, currency: str) -> None:
+        self._amount = amount
+        self._currency = currency
+
+
+class DictSum:
+    def __init__(self, augend: object, addend: object) -> None:
+        self.augend = augend
+        self.addend = addend
+
+
+class DictPair:
+    def __init__(self, from_currency: str, to_currency: str) -> None:
+        self._from = from_currency
+        self._to = to_currency
+
+
+def bytes_per_instance(factory: Callable[[int], object], count: int = 100_000) -> float:
+    """factory로 count개를 만들 때 늘어난 메모리를 인스턴스 수로 나눈 값"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        instances = [factory(i) for i in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # 리스트 자체가 차지하는 포인터 공간은 뺀다
+    list_size = instances.__sizeof__()
+    del instances
+    return (after - before - list_size) / count
+
+
+def measure(count: int = 100_000) -> dict[str, dict[str, float]]:
+    """클래스별 {"before": 바이트, "after": 바이트}
+
+    금액은 작은 정수 캐시 밖의 값이 되지 않도록 0으로 고정해 객체 자체만 잰다.
+    """
+    leaf = Money(0, "USD")
+    dict_leaf = DictMoney(0, "USD")
+    cases = {
+        "Money": (lambda _: DictMoney(0, "USD"), lambda _: Money(0, "USD")),
+        "Sum": (lambda _: DictSum(dict_leaf, dict_leaf), lambda _: Sum(leaf, leaf)),
+        "Pair": (lambda _: DictPair("CHF", "USD"), lambda _: Pair("CHF", "USD")),
+        "part01.Money": (
+            lambda _: DictMoney(0, "KRW"),
+            lambda _: part01_currency.Money(0, "KRW"),
+        ),
+    }
+    return {
+        name: {
+            "before": bytes_per_instance(before, count),
+            "after": bytes_per_instance(after, count),
+        }
+        for name, (before, after) in cases.items()
+    }
+
+
+def main() -> None:
+    print(f"{'class':<14}{'before':>10}{'after':>10}")
+    for name, result in measure().items():
+        print(f"{name:<14}{result['before']:>10.1f}{result['after']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
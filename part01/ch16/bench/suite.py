@@ -0,0 +1,281 @@
+"""Money/Expression/Bank 핫패스 벤치마크
+
+케이스마다 같은 작업을 repeat번 재서 가장 빠른 시간을 남긴다. 결과는 JSON으로
+저장해 커밋끼리 비교한다 (python -m part01.ch16.bench).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pickle
+import platform
+import subprocess
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+
+from part01.ch16 import serialization
+from part01.ch16.batch import MoneyBatch
+from part01.ch16.currency import Bank, Expression, Money, Sum
+
+# 케이스 준비 함수 - 크기를 받아 (작업 횟수, 측정할 함수)를 돌려준다
+Setup = Callable[[int], tuple[int, Callable[[], object]]]
+
+SUM_DEPTHS = (10, 100, 1_000, 10_000, 100_000, 1_000_000)
+BANK_CURRENCIES = (10, 100, 1_000, 10_000)
+DICT_SIZES = (1_000, 100_000)
+
+
+def money_times(size: int) -> tuple[int, Callable[[], object]]:
+    five = Money.dollar(5)
+
+    def run() -> None:
+        for multiplier in range(size):
+            five.times(multiplier)
+
+    return size, run
+
+
+def money_plus(size: int) -> tuple[int, Callable[[], object]]:
+    five = Money.dollar(5)
+    ten = Money.franc(10)
+
+    def run() -> None:
+        for _ in range(size):
+            five.plus(ten)
+
+    return size, run
+
+
+def sum_reduce(depth: int) -> tuple[int, Callable[[], object]]:
+    """depth개의 Money가 plus로 이어진 트리 하나를 축소"""
+    bank = Bank()
+    bank.add_rate("CHF", "USD", 2)
+    expr: Expression = Money.dollar(1)
+    for amount in range(depth - 1):
+        expr = expr.plus(Money.franc(amount))
+    return depth, lambda: bank.reduce(expr, "USD")
+
+
+def small_sum_reduce(size: int) -> tuple[int, Callable[[], object]]:
+    """$5 + 10 CHF 같은 잎 두 개짜리 트리를 size번 축소 - 호출마다 드는 고정 비용"""
+    bank = Bank()
+    bank.add_rate("CHF", "USD", 2)
+    expr = Money.dollar(5).plus(Money.franc(10))
+
+    def run() -> None:
+        for _ in range(size):
+            bank.reduce(expr, "USD")
+
+    return size, run
+
+
+def leaf_reduce(size: int) -> tuple[int, Callable[[], object]]:
+    """잎 size개를 내부 경로(_reduce_amount)로 축소 - 중간 Money를 만들지 않는다"""
+    bank = Bank()
+    bank.add_rate("CHF", "USD", 3)
+    leaves = [Money.franc(amount) for amount in range(size)]
+
+    def run() -> int:
+        return sum(leaf._reduce_amount(bank, "USD") for leaf in leaves)
+
+    return size, run
+
+
+def bank_rate(currencies: int) -> tuple[int, Callable[[], object]]:
+    """통화 currencies개가 모두 USD로 직접 환율을 가진 Bank에서 조회"""
+    bank = Bank()
+    codes = [f"C{index:05d}" for index in range(currencies)]
+    for rate, code in enumerate(codes, start=1):
+        bank.add_rate(code, "USD", rate)
+    for code in codes:
+        bank.rate(code, "USD")  # 색인을 채워 둔다
+
+    def run() -> None:
+        rate = bank.rate
+        for code in codes:
+            rate(code, "USD")
+
+    return currencies, run
+
+
+def money_dict(size: int) -> tuple[int, Callable[[], object]]:
+    """Money size개를 키로 쓰는 dict에서 __hash__/__eq__로 조회"""
+    table = {Money.dollar(amount): amount for amount in range(size)}
+    probes = [Money.dollar(amount) for amount in range(size)]
+
+    def run() -> None:
+        for probe in probes:
+            table[probe]
+
+    return size, run
+
+
+def balanced_tree(leaves: int) -> Expression:
+    """잎 leaves개의 균형 Sum 트리 - pickle이 재귀 한도에 걸리지 않는 모양"""
+    level: list[Expression] = [
+        Money(amount, ("USD", "CHF")[amount % 2]) for amount in range(leaves)
+    ]
+    while len(level) > 1:
+        paired = [Sum(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0]
+
+
+def serialization_round_trip(leaves: int) -> tuple[int, Callable[[], object]]:
+    expr = balanced_tree(leaves)
+    return leaves, lambda: serialization.loads(serialization.dumps(expr))
+
+
+def pickle_round_trip(leaves: int) -> tuple[int, Callable[[], object]]:
+    expr = balanced_tree(leaves)
+    return leaves, lambda: pickle.loads(pickle.dumps(expr))
+
+
+def batch_of(rows: int) -> MoneyBatch:
+    """세 통화가 섞인 rows행 MoneyBatch"""
+    return MoneyBatch(
+        [amount % 10_000 - 5_000 for amount in range(rows)],
+        [("USD", "CHF", "EUR")[amount % 3] for amount in range(rows)],
+    )
+
+
+def batch_serialization_round_trip(rows: int) -> tuple[int, Callable[[], object]]:
+    batch = batch_of(rows)
+    return rows, lambda: serialization.loads(serialization.dumps(batch))
+
+
+def batch_pickle_round_trip(rows: int) -> tuple[int, Callable[[], object]]:
+    batch = batch_of(rows)
+    return rows, lambda: pickle.loads(pickle.dumps(batch))
+
+
+def portfolios(count: int, leaves: int = 21) -> list[Expression]:
+    """잎 leaves개짜리 포트폴리오 count개"""
+    expressions = []
+    for index in range(count):
+        expr: Expression = Money.dollar(index)
+        for amount in range(leaves - 1):
+            expr = expr.plus(Money.franc(index + amount))
+        expressions.append(expr)
+    return expressions
+
+
+def reduce_many(workers: int, count: int) -> tuple[int, Callable[[], object]]:
+    """포트폴리오 count개를 reduce_many로 축소 - workers=1은 풀 없는 기준값"""
+    bank = Bank()
+    bank.add_rate("CHF", "USD", 2)
+    expressions = portfolios(count)
+    return count, lambda: bank.reduce_many(expressions, "USD", workers=workers)
+
+
+def cases(quick: bool = False) -> dict[str, tuple[Setup, int]]:
+    """{케이스 이름: (준비 함수, 크기)} - quick이면 큰 크기를 뺀다"""
+    limit = 10_000 if quick else None
+
+    def sizes(values: tuple[int, ...]) -> tuple[int, ...]:
+        return tuple(value for value in values if limit is None or value <= limit)
+
+    found: dict[str, tuple[Setup, int]] = {
+        "money_times": (money_times, 10_000 if quick else 200_000),
+        "money_plus": (money_plus, 10_000 if quick else 200_000),
+    }
+    for depth in sizes(SUM_DEPTHS):
+        found[f"sum_reduce[{depth}]"] = (sum_reduce, depth)
+    found["small_sum_reduce"] = (small_sum_reduce, 10_000 if quick else 200_000)
+    found["leaf_reduce"] = (leaf_reduce, 10_000 if quick else 200_000)
+    for currencies in sizes(BANK_CURRENCIES):
+        found[f"bank_rate[{currencies}]"] = (bank_rate, currencies)
+    for size in sizes(DICT_SIZES):
+        found[f"money_dict[{size}]"] = (money_dict, size)
+    leaves = 10_000 if quick else 100_000
+    found[f"serialization_round_trip[{leaves}]"] = (serialization_round_trip, leaves)
+    found[f"pickle_round_trip[{leaves}]"] = (pickle_round_trip, leaves)
+    rows = 10_000 if quick else 1_000_000
+    found[f"batch_serialization_round_trip[{rows}]"] = (
+        batch_serialization_round_trip,
+        rows,
+    )
+    found[f"batch_pickle_round_trip[{rows}]"] = (batch_pickle_round_trip, rows)
+    # 풀을 쓰는 쪽이 workers=1보다 빨라야 병렬 축소가 제값을 한다
+    count = 500 if quick else 20_000
+    for workers in sorted({1, os.cpu_count() or 1, 4}):
+        found[f"reduce_many[workers={workers}]"] = (
+            partial(reduce_many, workers),
+            count,
+        )
+    return found
+
+
+def measure(setup: Setup, size: int, repeat: int = 5) -> dict[str, float]:
+    operations, run = setup(size)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return {
+        "operations": operations,
+        "seconds": best,
+        "ops_per_sec": operations / best if best > 0 else float("inf"),
+    }
+
+
+def run_suite(
+    quick: bool = False, repeat: int = 5, only: str | None = None
+) -> dict[str, object]:
+    """모든 케이스를 재서 JSON으로 저장할 수 있는 dict를 만든다"""
+    results = {
+        name: measure(setup, size, repeat)
+        for name, (setup, size) in cases(quick).items()
+        if only is None or only in name
+    }
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "results": results,
+    }
+
+
+def compare(
+    base: dict[str, object], head: dict[str, object], threshold: float = 0.10
+) -> list[tuple[str, float, float]]:
+    """head가 base보다 threshold 넘게 느려진 케이스 [(이름, base ops/s, head ops/s)]"""
+    regressions = []
+    base_results = base["results"]
+    for name, result in head["results"].items():
+        if name not in base_results:
+            continue
+        before = base_results[name]["ops_per_sec"]
+        after = result["ops_per_sec"]
+        if after < before * (1 - threshold):
+            regressions.append((name, before, after))
+    return regressions
+
+
+def save(report: dict[str, object], path: str | Path) -> None:
+    Path(path).write_text(json.dumps(report, indent=2) + "\n")
+
+
+def load(path: str | Path) -> dict[str, object]:
+    return json.loads(Path(path).read_text())
+
+
+def _git_commit() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
@@ -0,0 +1,40 @@
+from part01.ch16.bench.__main__ import main
+from part01.ch16.bench.suite import cases, compare, load, measure, run_suite, sum_reduce
+
+
+def report(**ops_per_sec):
+    return {"results": {name: {"ops_per_sec": v} for name, v in ops_per_sec.items()}}
+
+
+class TestBenchSuite:
+    """벤치마크 스위트"""
+
+    def test_cases(self):
+        names = set(cases())
+        assert {"money_times", "sum_reduce[1000000]", "bank_rate[10000]"} <= names
+        assert "small_sum_reduce" in names
+        assert {"reduce_many[workers=1]", "reduce_many[workers=4]"} <= names
+        assert "sum_reduce[1000000]" not in cases(quick=True)
+        assert "batch_serialization_round_trip[1000000]" in names
+
+    def test_measure(self):
+        result = measure(sum_reduce, 100, repeat=1)
+        assert 100 == result["operations"]
+        assert result["ops_per_sec"] > 0
+
+    def test_run_suite_report(self):
+        report = run_suite(quick=True, repeat=1, only="money_plus")
+        assert ["money_plus"] == list(report["results"])
+        assert {"commit", "python", "timestamp"} <= set(report)
+
+    def test_compare(self):
+        base = report(a=100.0, b=100.0, c=100.0)
+        head = report(a=95.0, b=80.0, d=1.0)
+        assert [("b", 100.0, 80.0)] == compare(base, head, threshold=0.10)
+
+    def test_main_run_and_compare(self, tmp_path):
+        output = tmp_path / "bench.json"
+        args = ["run", "--quick", "--repeat", "1", "-k", "money_dict"]
+        assert 0 == main([*args, "-o", str(output)])
+        assert "money_dict[1000]" in load(output)["results"]
+        assert 0 == main(["compare", str(output), str(output)])
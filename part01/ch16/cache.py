@@ -0,0 +1,84 @@
+"""축소 결과 캐시 - 같은 Expression을 같은 환율 버전으로 다시 축소하지 않는다
+
+Bank.enable_cache()로 켤 때만 쓰인다.
+키는 (Expression 식별자, 환율표 버전, 도착 통화)다.
+Expression은 불변이므로 같은 객체의 결과는 버전이 같은 동안 바뀌지 않고,
+add_rate가 버전을 올리면 현재 버전으로 묻는 조회는 자연히 새 키를 쓴다.
+항목은 Expression 참조를 함께 들고 있어 id가 다른 객체에 재사용되지 않는다.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from part01.ch16.currency import Expression, Money
+
+
+class ReduceCache:
+    """maxsize개까지 담는 LRU 캐시 - ttl초가 지난 항목은 적중으로 치지 않는다"""
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # {(id, 버전, 도착 통화): (Expression, 결과, 만료 시각)}
+        self._table: OrderedDict[
+            tuple[int, int, str], tuple[Expression, Money, float]
+        ] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def get(self, source: Expression, version: int, to_currency: str) -> Money | None:
+        key = (id(source), version, to_currency)
+        with self._lock:
+            entry = self._table.get(key)
+            if entry is None or entry[0] is not source:
+                self.misses += 1
+                return None
+            if entry[2] <= self._clock():
+                del self._table[key]
+                self.misses += 1
+                return None
+            self._table.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(
+        self, source: Expression, version: int, to_currency: str, result: Money
+    ) -> None:
+        expires = float("inf") if self.ttl is None else self._clock() + self.ttl
+        with self._lock:
+            self._table[(id(source), version, to_currency)] = (source, result, expires)
+            if len(self._table) > self.maxsize:
+                self._table.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._table.clear()
+
+    def snapshot(self) -> dict[str, object]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._table),
+            }
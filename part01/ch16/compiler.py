@@ -0,0 +1,166 @@
+"""Expression 컴파일러 - 트리를 재사용 가능한 평가 계획(Plan)으로 바꾼다
+
+같은 모양의 포트폴리오를 환율만 바꿔 가며 여러 번 축소할 때, 트리 순회는
+compile에서 한 번만 하고 이후 reduce는 통화 수에 비례하는 비용만 든다.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from math import gcd
+
+from part01.ch16.currency import (
+    Bank,
+    Buckets,
+    Expression,
+    Money,
+    collect_buckets,
+    divide,
+)
+
+
+class Plan(Expression):
+    """통화별 계수 벡터로 펼친 Expression
+
+    통화마다 금액들의 최대공약수를 공통 배수(factor)로 끌어내고, 그것으로 나눈
+    (금액, 개수) 벡터를 금액 순으로 정렬해 든다. 실제 금액은 factor * 금액이다.
+    양수 times는 factor만 곱하므로 벡터를 다시 만들지 않고, plus는 벡터를 합쳐 Plan을
+    유지한다. 같은 값의 Plan은 factor와 벡터가 같으므로 ==로 비교할 수 있다.
+    """
+
+    def __init__(self, buckets: Buckets) -> None:
+        terms: dict[str, tuple[tuple[int, int], ...]] = {}
+        factors: dict[str, int] = {}
+        for currency, bucket in buckets.items():
+            # 금액이 모두 0이면 최대공약수도 0이다 - 끌어낼 배수가 없다
+            factor = gcd(*bucket) or 1
+            terms[currency] = tuple(
+                sorted((amount // factor, count) for amount, count in bucket.items())
+            )
+            factors[currency] = factor
+        self._set(terms, factors)
+
+    @classmethod
+    def _of(
+        cls,
+        terms: dict[str, tuple[tuple[int, int], ...]],
+        factors: dict[str, int],
+    ) -> Plan:
+        plan = cls.__new__(cls)
+        plan._set(terms, factors)
+        return plan
+
+    def _set(
+        self,
+        terms: dict[str, tuple[tuple[int, int], ...]],
+        factors: dict[str, int],
+    ) -> None:
+        # 통화별 (금액 / factor, 개수) 벡터와 공통 배수, factor를 빼고 더한 합계
+        self._terms = terms
+        self._factors = factors
+        self._totals = {
+            currency: sum(amount * count for amount, count in currency_terms)
+            for currency, currency_terms in terms.items()
+        }
+
+    def __repr__(self) -> str:
+        totals = {
+            currency: self._factors[currency] * total
+            for currency, total in self._totals.items()
+        }
+        return f"Plan({totals})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Plan):
+            return False
+        return self._factors == other._factors and self._terms == other._terms
+
+    def __hash__(self) -> int:
+        return hash(
+            frozenset(
+                (currency, self._factors[currency], terms)
+                for currency, terms in self._terms.items()
+            )
+        )
+
+    def currencies(self) -> list[str]:
+        return list(self._terms)
+
+    def reduce(self, bank: Bank, to_currency: str) -> Money:
+        return Money.of(self._reduce_amount(bank, to_currency), to_currency)
+
+    def _reduce_amount(self, bank: Bank, to_currency: str) -> int:
+        total = 0
+        for currency, terms in self._terms.items():
+            rate = bank.rate(currency, to_currency)
+            factor = self._factors[currency]
+            if factor % rate == 0:
+                # 모든 금액이 환율로 나누어떨어지면 합계에 한 번만 곱해도 같다
+                total += factor // rate * self._totals[currency]
+            else:
+                total += sum(
+                    divide(factor * amount, rate, bank.rounding) * count
+                    for amount, count in terms
+                )
+        return total
+
+    def plus(self, addend: Expression) -> Expression:
+        # Sum을 쌓지 않고 벡터를 합친다 - 몇 번을 더해도 크기는 (통화, 금액) 수에 머문다
+        buckets = collect_buckets(addend)
+        self._accumulate(buckets, [])
+        return Plan(buckets)
+
+    def times(self, multiplier: int) -> Expression:
+        if multiplier == 0:
+            return Plan(
+                {
+                    currency: Counter({0: sum(count for _, count in terms)})
+                    for currency, terms in self._terms.items()
+                }
+            )
+        factors = {}
+        for currency, factor in self._factors.items():
+            terms = self._terms[currency]
+            # 금액이 모두 0인 통화는 Plan(buckets)처럼 factor 1로 둔다 - 같은 값이
+            # 같은 Plan이 되도록. 금액은 서로 다르므로 칸이 하나일 때만 모두 0일 수 있다
+            if len(terms) > 1 or (terms and terms[0][0]):
+                factor *= abs(multiplier)
+            factors[currency] = factor
+        if multiplier > 0:
+            # 공통 배수만 곱한다 - 벡터는 그대로 함께 쓴다
+            return Plan._of(self._terms, factors)
+        terms = {
+            currency: tuple(sorted((-amount, count) for amount, count in terms))
+            for currency, terms in self._terms.items()
+        }
+        return Plan._of(terms, factors)
+
+    def _accumulate(self, buckets: Buckets, stack: list[Expression]) -> None:
+        for currency, terms in self._terms.items():
+            bucket = buckets.get(currency)
+            if bucket is None:
+                bucket = buckets[currency] = Counter()
+            factor = self._factors[currency]
+            for amount, count in terms:
+                bucket[factor * amount] += count
+
+
+def compile(source: Expression) -> Plan:
+    """Expression 트리를 한 번 순회해 평가 계획으로 만든다"""
+    return Plan(collect_buckets(source))
+
+
+def simplify(source: Expression) -> Expression:
+    """통화별 정규형으로 단순화한 Expression
+
+    같은 통화의 같은 금액은 개수로 접고, 통화마다 금액들의 공통 배수를 끌어내며, times는
+    그 배수에 접어 넣는다. 잎이 하나뿐이면 Money를, 아니면 Plan을 돌려준다. 환율은
+    Money마다 내림하므로 같은 통화라도 금액이 다른 잎은 하나로 더하지 않는다 -
+    3 CHF + 1 CHF를 4 CHF로 바꾸면 환율 2:1에서 $1이 $2가 되기 때문이다.
+    """
+    plan = compile(source)
+    if len(plan._terms) == 1:
+        ((currency, terms),) = plan._terms.items()
+        if len(terms) == 1 and terms[0][1] == 1:
+            return Money.of(plan._factors[currency] * terms[0][0], currency)
+    return plan
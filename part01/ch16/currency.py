@@ -1,6 +1,24 @@
 from __future__ import annotations
 
+import logging
+import os
+import sys
+import threading
+import time
 from abc import ABC, abstractmethod
+from array import array
+from collections import Counter, OrderedDict, deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from math import isqrt
+from pathlib import Path
+
+from part01.ch16.cache import ReduceCache
+from part01.ch16.instrumentation import ReduceStats
+from part01.ch16.ratefile import RateFile, write_rate_file
+
+logger = logging.getLogger(__name__)
 
 # Chapter 16: Abstraction, Finally
 # Part 1 완성 - 모든 TODO 항목 완료
@@ -8,14 +26,83 @@ from abc import ABC, abstractmethod
 # Kent Beck: "We have finished with the first example. Let's look
 # back and review what we've done."
 
+# 통화별 금액 버킷 - {통화: Counter({금액: 개수})}
+Buckets = dict[str, Counter]
+
+# 반올림 모드 - 환율로 나눈 나머지를 처리하는 방법
+ROUND_FLOOR = "floor"  # 음의 무한대 방향 (기본값, 기존 // 동작)
+ROUND_CEILING = "ceiling"  # 양의 무한대 방향
+ROUND_DOWN = "down"  # 0 방향 (절사)
+ROUND_UP = "up"  # 0에서 먼 방향
+ROUND_HALF_UP = "half_up"  # 사사오입 (0.5는 0에서 먼 방향)
+ROUND_HALF_EVEN = "half_even"  # 은행가 반올림 (0.5는 짝수 방향)
+ROUNDING_MODES = (
+    ROUND_FLOOR,
+    ROUND_CEILING,
+    ROUND_DOWN,
+    ROUND_UP,
+    ROUND_HALF_UP,
+    ROUND_HALF_EVEN,
+)
+
+# 통화별 소수 자릿수 - 금액은 최소 단위(센트, 상팀 등)의 정수로 담는다
+EXPONENTS: dict[str, int] = {
+    "USD": 2,
+    "EUR": 2,
+    "CHF": 2,
+    "GBP": 2,
+    "KRW": 0,
+    "JPY": 0,
+}
+
+
+def exponent(currency: str) -> int:
+    """통화의 소수 자릿수 - 모르는 통화는 2자리로 본다"""
+    return EXPONENTS.get(currency, 2)
+
+
+def divide(amount: int, rate: int, rounding: str = ROUND_FLOOR) -> int:
+    """amount / rate를 rounding 모드로 반올림한 정수
+
+    Decimal 없이 정수 연산만 쓴다. ROUND_FLOOR는 // 한 번으로 끝난다.
+    """
+    if rounding == ROUND_FLOOR:
+        return amount // rate
+    if rate < 0:
+        amount, rate = -amount, -rate
+    quotient, remainder = divmod(amount, rate)
+    if remainder == 0:
+        return quotient
+    # 참값은 quotient와 quotient + 1 사이에 있다
+    if rounding == ROUND_CEILING:
+        return quotient + 1
+    if rounding == ROUND_DOWN:
+        return quotient if quotient >= 0 else quotient + 1
+    if rounding == ROUND_UP:
+        return quotient + 1 if quotient >= 0 else quotient
+    twice = remainder * 2
+    if twice != rate:
+        return quotient + 1 if twice > rate else quotient
+    if rounding == ROUND_HALF_UP:
+        return quotient + 1 if quotient >= 0 else quotient
+    if rounding == ROUND_HALF_EVEN:
+        return quotient + (quotient & 1)
+    raise ValueError(f"알 수 없는 반올림 모드입니다: {rounding}")
+
 
 # Expression 인터페이스 - 완전한 추상화
 class Expression(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def reduce(self, bank: Bank, to_currency: str) -> Money:
         """Expression을 단일 통화로 환산"""
         pass
 
+    def _reduce_amount(self, bank: Bank, to_currency: str) -> int:
+        """reduce한 금액만 - 내부 경로는 중간 Money 없이 이 값을 주고받는다"""
+        return self.reduce(bank, to_currency)._amount
+
     @abstractmethod
     def plus(self, addend: Expression) -> Expression:
         """두 Expression의 합"""
@@ -26,9 +113,17 @@ class Expression(ABC):
         """Expression에 배수 적용"""
         pass
 
+    @abstractmethod
+    def _accumulate(self, buckets: Buckets, stack: list[Expression]) -> None:
+        """순회 중인 노드의 금액을 버킷에 모으거나 자식 노드를 스택에 쌓는다"""
+        pass
+
 
 # Money 클래스 - Expression 구현
 class Money(Expression):
+    # __dict__ 없이 두 필드만 담는다 - 인스턴스 크기가 절반 이하로 줄어든다
+    __slots__ = ("_amount", "_currency")
+
     def __init__(self, amount: int, currency: str) -> None:
         self._amount = amount
         self._currency = currency
@@ -37,16 +132,31 @@ class Money(Expression):
         return self._currency
 
     def times(self, multiplier: int) -> Expression:
-        return Money(self._amount * multiplier, self._currency)
+        return Money.of(self._amount * multiplier, self._currency)
 
     def plus(self, addend: Expression) -> Expression:
         return Sum(self, addend)
 
     def reduce(self, bank: Bank, to_currency: str) -> Money:
+        return Money.of(self._reduce_amount(bank, to_currency), to_currency)
+
+    def _reduce_amount(self, bank: Bank, to_currency: str) -> int:
         rate = bank.rate(self._currency, to_currency)
-        return Money(self._amount // rate, to_currency)
+        return divide(self._amount, rate, bank.rounding)
+
+    def _accumulate(self, buckets: Buckets, stack: list[Expression]) -> None:
+        bucket = buckets.get(self._currency)
+        if bucket is None:
+            bucket = buckets[self._currency] = Counter()
+        bucket[self._amount] += 1
+
+    def __reduce__(self) -> tuple[type[Money], tuple[int, str]]:
+        # 슬롯 객체의 기본 pickle(copyreg 상태 dict)보다 훨씬 작고 빠르다
+        return Money, (self._amount, self._currency)
 
     def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
         if not isinstance(other, Money):
             return False
         return self._amount == other._amount and self._currency == other._currency
@@ -57,28 +167,165 @@ class Money(Expression):
     def __repr__(self) -> str:
         return f"Money({self._amount}, '{self._currency}')"
 
+    def format(self) -> str:
+        """최소 단위 금액을 소수점 표기로: Money(1234, "USD") -> 12.34 USD"""
+        digits = exponent(self._currency)
+        if digits == 0:
+            return f"{self._amount} {self._currency}"
+        sign = "-" if self._amount < 0 else ""
+        whole, fraction = divmod(abs(self._amount), 10**digits)
+        return f"{sign}{whole}.{fraction:0{digits}d} {self._currency}"
+
+    @staticmethod
+    def parse(text: str, currency: str, rounding: str = ROUND_HALF_EVEN) -> Money:
+        """소수점 표기를 최소 단위 금액으로: "12.34", "USD" -> Money(1234, "USD")
+
+        통화의 자릿수보다 긴 소수는 rounding 모드로 반올림한다. 정수부는 부호 하나와
+        ASCII 숫자, 소수부는 ASCII 숫자만 받는다 - int()가 받는 "_"나 소수부의 부호는
+        ValueError다.
+        """
+        digits = exponent(currency)
+        whole, _, fraction = text.strip().partition(".")
+        numerals = whole[1:] if whole[:1] in ("-", "+") else whole
+        numerals += fraction
+        if not (numerals.isascii() and numerals.isdigit()):
+            raise ValueError(f"금액 표기가 올바르지 않습니다: {text!r}")
+        scaled = int(whole + fraction)
+        extra = len(fraction) - digits
+        if extra > 0:
+            scaled = divide(scaled, 10**extra, rounding)
+        else:
+            scaled *= 10**-extra
+        return Money.of(scaled, currency)
+
     # 팩토리 메서드
+    @staticmethod
+    def of(amount: int, currency: str) -> Money:
+        """인턴 테이블이 켜져 있으면 같은 값의 Money 인스턴스를 재사용한다"""
+        interner = _interner
+        if interner is None:
+            return Money(amount, currency)
+        return interner.intern(amount, currency)
+
     @staticmethod
     def dollar(amount: int) -> Money:
-        return Money(amount, "USD")
+        return Money.of(amount, "USD")
 
     @staticmethod
     def franc(amount: int) -> Money:
-        return Money(amount, "CHF")
+        return Money.of(amount, "CHF")
+
+
+# MoneyInterner 클래스 - 같은 값의 Money가 한 인스턴스를 공유하게 한다
+class MoneyInterner:
+    """최근에 쓰인 maxsize개 값만 남기는 LRU 인턴 테이블"""
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        self._table: OrderedDict[tuple[int, str], Money] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def intern(self, amount: int, currency: str) -> Money:
+        key = (amount, currency)
+        money = self._table.get(key)
+        if money is not None:
+            try:
+                self._table.move_to_end(key)
+            except KeyError:
+                pass  # 다른 스레드가 막 내보낸 항목 - 인스턴스는 그대로 쓴다
+            return money
+        money = self._table.setdefault(key, Money(amount, currency))
+        if len(self._table) > self.maxsize:
+            try:
+                self._table.popitem(last=False)
+            except KeyError:
+                pass
+        return money
+
+
+# 인턴 테이블 - 기본은 꺼져 있다
+_interner: MoneyInterner | None = None
+
+
+def enable_interning(maxsize: int = 4096) -> MoneyInterner:
+    """Money.of와 팩토리 메서드가 인턴 테이블을 거치게 한다"""
+    global _interner
+    _interner = MoneyInterner(maxsize)
+    return _interner
+
+
+def disable_interning() -> None:
+    global _interner
+    _interner = None
 
 
 # Sum 클래스 - Expression 구현
 class Sum(Expression):
+    # _hash - 구조 해시 캐시 (처음 hash()할 때 채운다)
+    __slots__ = ("augend", "addend", "_hash")
+
     def __init__(self, augend: Expression, addend: Expression) -> None:
         self.augend = augend
         self.addend = addend
+        self._hash: int | None = None
+
+    def __eq__(self, other: object) -> bool:
+        """구조 동등성 - 같은 모양의 트리에 같은 잎이 같은 순서로 있으면 같다"""
+        if self is other:
+            return True
+        if not isinstance(other, Sum):
+            return False
+        stack: list[tuple[Expression, Expression]] = [(self, other)]
+        seen: set[tuple[int, int]] = set()
+        while stack:
+            left, right = stack.pop()
+            if left is right:
+                continue
+            if not isinstance(left, Sum):
+                if left != right:
+                    return False
+                continue
+            if not isinstance(right, Sum) or hash(left) != hash(right):
+                return False
+            # 공유된 부분 트리 쌍은 한 번만 비교한다
+            pair = (id(left), id(right))
+            if pair in seen:
+                continue
+            seen.add(pair)
+            stack.append((left.addend, right.addend))
+            stack.append((left.augend, right.augend))
+        return True
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            _hash_tree(self)
+        return self._hash
+
+    def __reduce__(self) -> tuple[Callable[[list], Sum], tuple[list]]:
+        # 자식마다 재귀하는 기본 pickle 대신 펼친 목록 하나로 보낸다 - 깊은 트리도
+        # 스택이 넘치지 않는다. 문자열 해시는 프로세스마다 달라지므로 캐시한 해시는 뺀다
+        return _unflatten, (_flatten(self),)
 
     def reduce(self, bank: Bank, to_currency: str) -> Money:
-        amount = (
-            self.augend.reduce(bank, to_currency)._amount
-            + self.addend.reduce(bank, to_currency)._amount
-        )
-        return Money(amount, to_currency)
+        return Money.of(self._reduce_amount(bank, to_currency), to_currency)
+
+    def _reduce_amount(self, bank: Bank, to_currency: str) -> int:
+        augend = self.augend
+        addend = self.addend
+        if type(augend) is Money and type(addend) is Money:
+            # 잎 두 개짜리 Sum - 버킷과 환율 표 없이 바로 환산한다
+            rounding = bank.rounding
+            return divide(
+                augend._amount, bank.rate(augend._currency, to_currency), rounding
+            ) + divide(
+                addend._amount, bank.rate(addend._currency, to_currency), rounding
+            )
+        # 재귀 대신 반복 순회 - 트리 깊이와 무관하게 스택 깊이가 일정하다
+        buckets = collect_buckets(self)
+        rates = {currency: bank.rate(currency, to_currency) for currency in buckets}
+        return convert_buckets(buckets, rates, bank.rounding)
 
     def plus(self, addend: Expression) -> Expression:
         return Sum(self, addend)
@@ -86,9 +333,123 @@ class Sum(Expression):
     def times(self, multiplier: int) -> Expression:
         return Sum(self.augend.times(multiplier), self.addend.times(multiplier))
 
+    def _accumulate(self, buckets: Buckets, stack: list[Expression]) -> None:
+        # augend가 먼저 꺼내지도록 addend를 먼저 쌓는다
+        stack.append(self.addend)
+        stack.append(self.augend)
+
+
+def _hash_tree(root: Sum) -> None:
+    """해시가 비어 있는 Sum들의 구조 해시를 자식부터 채운다 - 재귀 없이"""
+    stack = [root]
+    while stack:
+        node = stack[-1]
+        pending = [
+            child
+            for child in (node.augend, node.addend)
+            if isinstance(child, Sum) and child._hash is None
+        ]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        if node._hash is None:
+            node._hash = hash((Sum, hash(node.augend), hash(node.addend)))
+
+
+def _flatten(root: Sum) -> list[object]:
+    """Sum 트리를 자식이 부모보다 먼저 오는 목록으로 - 재귀 없이
+
+    잎은 그대로, Sum은 (augend 위치, addend 위치, 클래스)로 담는다. 같은 객체는
+    한 번만 담으므로 공유된 부분 트리도 그대로 복원된다.
+    """
+    entries: list[object] = []
+    positions: dict[int, int] = {}
+    stack: list[tuple[Expression, bool]] = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if id(node) in positions:
+            continue
+        if isinstance(node, Sum):
+            if not expanded:
+                stack.append((node, True))
+                stack.append((node.addend, False))
+                stack.append((node.augend, False))
+                continue
+            entry: object = (
+                positions[id(node.augend)],
+                positions[id(node.addend)],
+                type(node),
+            )
+        else:
+            entry = node
+        positions[id(node)] = len(entries)
+        entries.append(entry)
+    return entries
+
+
+def _unflatten(entries: list[object]) -> Sum:
+    built: list[Expression] = []
+    for entry in entries:
+        if type(entry) is tuple:
+            augend, addend, cls = entry
+            entry = cls(built[augend], built[addend])
+        built.append(entry)
+    return built[-1]
+
+
+# 축소(reduce) 엔진 - 중간 Money 객체 없이 트리를 한 번만 순회
+def collect_buckets(source: Expression) -> Buckets:
+    """Expression 트리를 반복적으로 순회하여 통화별 금액 버킷을 만든다"""
+    buckets: Buckets = {}
+    stack = [source]
+    pop = stack.pop
+    while stack:
+        pop()._accumulate(buckets, stack)
+    return buckets
+
+
+def collect_counted(source: Expression) -> tuple[Buckets, int]:
+    """collect_buckets와 같은 버킷과 방문한 노드 수 - 계측용, 한 번만 순회한다
+
+    MoneyBatch처럼 스스로 모으는 노드는 하나로 센다.
+    """
+    buckets: Buckets = {}
+    stack = [source]
+    pop = stack.pop
+    nodes = 0
+    while stack:
+        pop()._accumulate(buckets, stack)
+        nodes += 1
+    return buckets, nodes
+
+
+def convert_buckets(
+    buckets: Buckets, rates: dict[str, int], rounding: str = ROUND_FLOOR
+) -> int:
+    """통화별 버킷을 환율로 환산한 합계
+
+    잎(Money)마다 반올림한 값을 더하므로 재귀적으로 reduce한 결과와 같다.
+    """
+    total = 0
+    for currency, bucket in buckets.items():
+        rate = rates[currency]
+        if rate == 1:
+            total += sum(amount * count for amount, count in bucket.items())
+        elif rounding == ROUND_FLOOR:
+            total += sum((amount // rate) * count for amount, count in bucket.items())
+        else:
+            total += sum(
+                divide(amount, rate, rounding) * count
+                for amount, count in bucket.items()
+            )
+    return total
+
 
 # Pair 클래스 - 환율 키
 class Pair:
+    __slots__ = ("_from", "_to")
+
     def __init__(self, from_currency: str, to_currency: str) -> None:
         self._from = from_currency
         self._to = to_currency
@@ -102,18 +463,557 @@ class Pair:
         return hash((self._from, self._to))
 
 
+# 바뀐 행이 이 수와 √(기준 그래프 행 수) 중 큰 쪽을 넘으면 기준 그래프로 합친다
+MIN_CHANGES = 8
+
+_NO_RATES: dict[str, int] = {}
+
+
+# RateSnapshot 클래스 - 특정 버전의 환율표 (불변)
+class RateSnapshot:
+    """환율 그래프 한 버전
+
+    그래프는 여러 버전이 함께 쓰는 기준 그래프와 그 뒤로 바뀐 행만 담은 변경분으로
+    나뉜다. 변경분이 √N 행을 넘으면 새 기준 그래프로 합치므로 with_rate 한 번의
+    비용과 버전 하나가 따로 드는 메모리는 평균 O(√N)이다 (N은 출발 통화 수).
+    """
+
+    def __init__(
+        self,
+        version: int,
+        graph: dict[str, dict[str, int]],
+        changes: dict[str, dict[str, int]] | None = None,
+    ) -> None:
+        self.version = version
+        # 기준 그래프 {from: {to: rate}} - 등록된 직접 환율, 여러 버전이 함께 쓴다
+        self._graph = graph
+        # 기준 그래프 이후 바뀐 행 {from: {to: rate}} - 이 버전만의 것
+        self._changes = changes if changes is not None else {}
+        # 환율 색인 {from: {to: rate}} - 경로 탐색 결과 메모
+        self._index: dict[str, dict[str, int]] = {}
+
+    def rate(self, from_currency: str, to_currency: str) -> int:
+        if from_currency == to_currency:
+            return 1
+        try:
+            return self._index[from_currency][to_currency]
+        except KeyError:
+            return self._resolve(from_currency, to_currency)
+
+    def is_indexed(self, from_currency: str, to_currency: str) -> bool:
+        """경로 탐색 없이 색인만으로 답할 수 있는지"""
+        if from_currency == to_currency:
+            return True
+        return to_currency in self._index.get(from_currency, ())
+
+    def rates(self) -> dict[tuple[str, str], int]:
+        """등록된 직접 환율 {(from, to): rate}"""
+        return {
+            (from_currency, to_currency): rate
+            for from_currency, row in {**self._graph, **self._changes}.items()
+            for to_currency, rate in row.items()
+        }
+
+    def with_rate(
+        self, from_currency: str, to_currency: str, rate: int
+    ) -> RateSnapshot:
+        """환율 하나를 바꾼 다음 버전 - 바뀐 행과 변경분만 복사한다"""
+        graph = self._graph
+        changes = dict(self._changes)
+        changes[from_currency] = {**self._row(from_currency), to_currency: rate}
+        if len(changes) > max(MIN_CHANGES, isqrt(len(graph))):
+            graph = {**graph, **changes}
+            changes = {}
+        return RateSnapshot(self.version + 1, graph, changes)
+
+    def _row(self, currency: str) -> dict[str, int]:
+        row = self._changes.get(currency)
+        if row is None:
+            row = self._graph.get(currency, _NO_RATES)
+        return row
+
+    def _resolve(self, from_currency: str, to_currency: str) -> int:
+        """from_currency에서 닿는 모든 통화의 환율을 최단 경로(BFS)로 계산해 둔다
+
+        CHF→USD, USD→EUR만 등록되어 있으면 CHF→EUR은 두 환율의 곱이 된다.
+        """
+        row = self._row
+        rates = {from_currency: 1}
+        frontier = [from_currency]
+        while frontier:
+            reached = []
+            for currency in frontier:
+                for target, rate in row(currency).items():
+                    if target not in rates:
+                        rates[target] = rates[currency] * rate
+                        reached.append(target)
+            frontier = reached
+        # 색인 행 하나를 통째로 바꿔 넣으므로 동시에 읽는 쪽도 안전하다
+        self._index[from_currency] = rates
+        if to_currency not in rates:
+            raise KeyError((from_currency, to_currency))
+        return rates[to_currency]
+
+
+# MappedSnapshot 클래스 - 환율 파일 위의 읽기 전용 스냅샷
+class MappedSnapshot(RateSnapshot):
+    """mmap으로 연 환율 파일의 스냅샷 - 경로 탐색 결과까지 파일에 들어 있다
+
+    rate는 파일의 행렬 칸 하나를 읽을 뿐이다. with_rate는 파일의 직접 환율로
+    보통 RateSnapshot을 만들어 그 위에 바꾼다 (파일은 건드리지 않는다).
+    """
+
+    def __init__(self, rate_file: RateFile) -> None:
+        self.version = rate_file.version
+        self._file = rate_file
+        self._ids = rate_file.ids
+        self._size = rate_file.size
+        self._resolved = rate_file.resolved
+        self._materialized: RateSnapshot | None = None
+
+    @classmethod
+    def open(cls, path: str | Path) -> MappedSnapshot:
+        return cls(RateFile(path))
+
+    @classmethod
+    def _reopen(cls, path: str | Path, version: int) -> MappedSnapshot:
+        """path를 다시 열어 version인지 확인한다 - 파일이 바뀌었으면 ValueError"""
+        snapshot = cls.open(path)
+        if snapshot.version != version:
+            raise ValueError(
+                f"환율 파일 {path}의 버전이 {version}에서 {snapshot.version}(으)로"
+                " 바뀌었습니다"
+            )
+        return snapshot
+
+    def __reduce__(
+        self,
+    ) -> tuple[Callable[..., MappedSnapshot], tuple[Path, int]]:
+        # 다른 프로세스에는 경로와 버전만 보내 같은 파일을 다시 연다.
+        # save_snapshot이 파일을 바꿔 두었으면 다른 버전을 조용히 쓰지 않고 실패한다.
+        return MappedSnapshot._reopen, (self._file.path, self.version)
+
+    def rate(self, from_currency: str, to_currency: str) -> int:
+        if from_currency == to_currency:
+            return 1
+        try:
+            cell = self._ids[from_currency] * self._size + self._ids[to_currency]
+        except KeyError:
+            raise KeyError((from_currency, to_currency)) from None
+        rate = self._resolved[cell]
+        if rate == 0:
+            raise KeyError((from_currency, to_currency))
+        return rate
+
+    def is_indexed(self, from_currency: str, to_currency: str) -> bool:
+        return True
+
+    def rates(self) -> dict[tuple[str, str], int]:
+        return self._materialize().rates()
+
+    def with_rate(
+        self, from_currency: str, to_currency: str, rate: int
+    ) -> RateSnapshot:
+        return self._materialize().with_rate(from_currency, to_currency, rate)
+
+    def _materialize(self) -> RateSnapshot:
+        """파일의 직접 환율로 만든 같은 버전의 보통 스냅샷"""
+        if self._materialized is None:
+            codes = self._file.codes
+            direct = self._file.direct
+            graph: dict[str, dict[str, int]] = {}
+            for from_id, from_currency in enumerate(codes):
+                row = from_id * self._size
+                for to_id, to_currency in enumerate(codes):
+                    rate = direct[row + to_id]
+                    if rate:
+                        graph.setdefault(from_currency, {})[to_currency] = rate
+            self._materialized = RateSnapshot(self.version, graph)
+        return self._materialized
+
+
+# 환율 변경 구독자 - (새 스냅샷, 바뀐 from, 바뀐 to)를 받는다
+RateListener = Callable[[RateSnapshot, str, str], None]
+
+
 # Bank 클래스 - 환율 관리
 class Bank:
-    def __init__(self) -> None:
-        self._rates: dict[Pair, int] = {}
+    """버전이 매겨진 환율표
+
+    읽는 쪽은 락 없이 현재 스냅샷을 가져가고, add_rate는 새 스냅샷을 만들어
+    속성 하나를 바꾸는 것으로 게시한다. 최근 history개 버전은 번호로 다시 꺼낼 수 있다.
+    """
+
+    def __init__(
+        self,
+        snapshot: RateSnapshot | None = None,
+        history: int = 1024,
+        rounding: str = ROUND_FLOOR,
+    ) -> None:
+        if rounding not in ROUNDING_MODES:
+            raise ValueError(f"알 수 없는 반올림 모드입니다: {rounding}")
+        self.rounding = rounding
+        self._lock = threading.Lock()
+        self._snapshot = snapshot or RateSnapshot(0, {})
+        # 현재 스냅샷에 고정된 읽기 전용 뷰 - 스냅샷과 함께 바꿔 게시한다
+        self._pinned = self._pin(self._snapshot)
+        self._history = {self._snapshot.version: self._snapshot}
+        self._history_size = history
+        # 환율 변경 구독자 - 게시할 때마다 통째로 바꾸는 튜플
+        self._listeners: tuple[RateListener, ...] = ()
+        # 계측 - None이면 꺼져 있다
+        self._stats: ReduceStats | None = None
+        # 축소 결과 캐시 - None이면 꺼져 있다
+        self._cache: ReduceCache | None = None
+        # 계측이나 캐시가 하나라도 켜져 있는지 - reduce는 이것 하나만 확인한다
+        self._hooked = False
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def snapshot(self, version: int | None = None) -> RateSnapshot:
+        if version is None:
+            return self._snapshot
+        try:
+            return self._history[version]
+        except KeyError:
+            raise KeyError(f"환율표 버전 {version}을 찾을 수 없습니다") from None
+
+    def at(self, version: int | None = None) -> PinnedBank:
+        """지정한 버전(기본은 현재 버전)에 고정된 읽기 전용 Bank"""
+        if version is None:
+            return self._pinned
+        return self._pin(self.snapshot(version))
+
+    def _pin(
+        self, snapshot: RateSnapshot, stats: ReduceStats | None = None
+    ) -> PinnedBank:
+        return PinnedBank(snapshot, self.rounding, stats)
+
+    def reduce(
+        self, source: Expression, to_currency: str, version: int | None = None
+    ) -> Money:
+        if self._hooked:
+            return self._reduce_hooked(source, to_currency, version)
+        # 축소 도중 환율이 바뀌어도 한 버전의 환율만 보도록 고정해서 넘긴다
+        return source.reduce(self.at(version), to_currency)
+
+    def _reduce_hooked(
+        self, source: Expression, to_currency: str, version: int | None
+    ) -> Money:
+        # 도중에 꺼질 수 있으므로 한 번씩만 읽는다
+        cache = self._cache
+        stats = self._stats
+        if cache is not None:
+            return self._reduce_cached(source, to_currency, version, cache, stats)
+        if stats is not None:
+            return self._reduce_instrumented(
+                source, to_currency, self.snapshot(version), stats
+            )
+        return source.reduce(self.at(version), to_currency)
+
+    def reduce_to_all(
+        self,
+        source: Expression,
+        to_currencies: Iterable[str],
+        version: int | None = None,
+    ) -> dict[str, Money]:
+        """source를 여러 통화로 한꺼번에 축소한다 - {도착 통화: Money}
+
+        트리는 한 번만 순회해 통화별 버킷을 모으고, 도착 통화마다 환율 벡터만 바꿔
+        환산한다. 모든 도착 통화가 같은 버전의 환율을 쓴다.
+        """
+        bank = self._pin(self.snapshot(version), self._stats)
+        buckets = collect_buckets(source)
+        results = {}
+        for to_currency in to_currencies:
+            rates = {currency: bank.rate(currency, to_currency) for currency in buckets}
+            amount = convert_buckets(buckets, rates, bank.rounding)
+            results[to_currency] = Money.of(amount, to_currency)
+        return results
+
+    def _reduce_cached(
+        self,
+        source: Expression,
+        to_currency: str,
+        version: int | None,
+        cache: ReduceCache,
+        stats: ReduceStats | None,
+    ) -> Money:
+        # 키에 쓸 버전과 축소에 쓸 스냅샷이 같도록 먼저 고정한다
+        snapshot = self.snapshot(version)
+        result = cache.get(source, snapshot.version, to_currency)
+        if result is not None:
+            return result
+        if stats is not None:
+            result = self._reduce_instrumented(source, to_currency, snapshot, stats)
+        else:
+            result = source.reduce(self._pin(snapshot), to_currency)
+        cache.put(source, snapshot.version, to_currency, result)
+        return result
+
+    def _reduce_instrumented(
+        self,
+        source: Expression,
+        to_currency: str,
+        snapshot: RateSnapshot,
+        stats: ReduceStats,
+    ) -> Money:
+        bank = self._pin(snapshot, stats)
+        start = time.perf_counter()
+        # 축소하는 순회에서 노드도 함께 센다 - 트리를 두 번 돌지 않도록
+        buckets, nodes = collect_counted(source)
+        rates = {currency: bank.rate(currency, to_currency) for currency in buckets}
+        amount = convert_buckets(buckets, rates, bank.rounding)
+        elapsed = time.perf_counter() - start
+        stats.record_reduce(nodes, elapsed)
+        return Money.of(amount, to_currency)
+
+    def enable_stats(self) -> ReduceStats:
+        """reduce와 rate 통계를 모으기 시작한다"""
+        self._stats = ReduceStats()
+        self._hooked = True
+        return self._stats
+
+    def disable_stats(self) -> None:
+        self._stats = None
+        self._hooked = self._cache is not None
+
+    def stats(self) -> dict[str, object]:
+        """통계 스냅샷 - 계측이 꺼져 있으면 빈 dict"""
+        stats = self._stats
+        return stats.snapshot() if stats is not None else {}
+
+    def enable_cache(self, maxsize: int = 1024, ttl: float | None = None) -> None:
+        """같은 Expression 객체의 축소 결과를 버전·도착 통화별로 캐시한다"""
+        self._cache = ReduceCache(maxsize, ttl)
+        self._hooked = True
 
-    def reduce(self, source: Expression, to_currency: str) -> Money:
-        return source.reduce(self, to_currency)
+    def disable_cache(self) -> None:
+        self._cache = None
+        self._hooked = self._stats is not None
+
+    def cache_stats(self) -> dict[str, object]:
+        """캐시 적중 통계 - 캐시가 꺼져 있으면 빈 dict"""
+        cache = self._cache
+        return cache.snapshot() if cache is not None else {}
+
+    def reduce_many(
+        self,
+        expressions: Iterable[Expression],
+        to_currency: str,
+        workers: int | None = None,
+        chunksize: int = 1024,
+    ) -> list[Money]:
+        """여러 Expression을 프로세스 풀에 나눠 축소한다 - 결과는 입력 순서대로
+
+        환율표는 현재 스냅샷 하나를 워커마다 처음 한 번만 보낸다. 입력은 chunksize개씩
+        묶어 serialization.dumps 바이트 하나로 보내고(pickle보다 몇 배 빠르다), 처리
+        중인 묶음을 워커 수의 두 배까지만 두므로 입력이 커도 한꺼번에 쌓이지 않는다.
+        직렬화할 수 없는 노드(Plan, Dag 등)가 든 묶음만 pickle로 보낸다.
+        workers가 1이면 풀 없이 현재 프로세스에서 축소한다.
+        """
+        bank = self.at()
+        if workers == 1:
+            return [source.reduce(bank, to_currency) for source in expressions]
+        workers = workers or os.cpu_count() or 1
+        results: list[Money] = []
+        pending: deque[Future[list[int]]] = deque()
+
+        def collect() -> None:
+            for amount in pending.popleft().result():
+                results.append(Money.of(amount, to_currency))
+
+        sources = iter(expressions)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(bank.snapshot(), self.rounding),
+        ) as pool:
+            while chunk := list(islice(sources, chunksize)):
+                if len(pending) >= 2 * workers:
+                    collect()
+                pending.append(
+                    pool.submit(_reduce_in_worker, _pack_chunk(chunk), to_currency)
+                )
+            while pending:
+                collect()
+        return results
 
     def add_rate(self, from_currency: str, to_currency: str, rate: int) -> None:
-        self._rates[Pair(from_currency, to_currency)] = rate
+        # 게시하기 전에 막는다 - 0 환율은 축소와 구독자의 환산을 0으로 나누게 한다
+        if rate <= 0:
+            raise ValueError(f"환율은 양수여야 합니다: {rate}")
+        # 통화 코드를 intern해 두면 색인 조회가 대부분 포인터 비교로 끝난다
+        from_currency = sys.intern(from_currency)
+        to_currency = sys.intern(to_currency)
+        with self._lock:
+            snapshot = self._snapshot.with_rate(from_currency, to_currency, rate)
+            self._history[snapshot.version] = snapshot
+            self._history.pop(snapshot.version - self._history_size, None)
+            self._snapshot = snapshot
+            self._pinned = self._pin(snapshot)
+            # 락 안에서 알려야 구독자가 버전 순서대로 변경을 받는다
+            for listener in self._listeners:
+                try:
+                    listener(snapshot, from_currency, to_currency)
+                except Exception:
+                    # 새 버전은 이미 게시됐다 - 실패한 구독자 뒤의 구독자도 알린다
+                    logger.exception(
+                        "환율 변경 구독자가 실패했습니다: %r (버전 %d)",
+                        listener,
+                        snapshot.version,
+                    )
+
+    def subscribe(self, listener: RateListener) -> None:
+        """add_rate가 새 버전을 게시할 때마다 listener(snapshot, from, to)를 호출한다
+
+        listener는 쓰기 락 안에서 불리므로 add_rate를 다시 호출하면 안 된다.
+        listener가 예외를 내면 로그만 남기고 다음 구독자로 넘어간다.
+        """
+        with self._lock:
+            self._listeners = (*self._listeners, listener)
+
+    def unsubscribe(self, listener: RateListener) -> None:
+        with self._lock:
+            listeners = list(self._listeners)
+            listeners.remove(listener)
+            self._listeners = tuple(listeners)
+
+    def save_snapshot(self, path: str | Path, version: int | None = None) -> None:
+        """스냅샷(기본은 현재 버전)을 환율 파일로 저장한다
+
+        통화 수를 N이라 할 때 파일은 N×N 행렬 두 개이므로 통화가 수백 개인 표에 맞다.
+        """
+        snapshot = self.snapshot(version)
+        direct_rates = snapshot.rates()
+        codes = sorted({currency for pair in direct_rates for currency in pair})
+        ids = {code: i for i, code in enumerate(codes)}
+        size = len(codes)
+        direct = array("q", bytes(8 * size * size))
+        resolved = array("q", bytes(8 * size * size))
+        try:
+            for (from_currency, to_currency), rate in direct_rates.items():
+                direct[ids[from_currency] * size + ids[to_currency]] = rate
+            for from_id, from_currency in enumerate(codes):
+                for to_id, to_currency in enumerate(codes):
+                    try:
+                        rate = snapshot.rate(from_currency, to_currency)
+                    except KeyError:
+                        continue
+                    resolved[from_id * size + to_id] = rate
+        except OverflowError:
+            raise ValueError("int64 범위를 넘는 환율은 저장할 수 없습니다") from None
+        write_rate_file(path, snapshot.version, codes, direct, resolved)
+
+    @staticmethod
+    def open_snapshot(
+        path: str | Path, history: int = 1024, rounding: str = ROUND_FLOOR
+    ) -> Bank:
+        """환율 파일을 읽기 전용 mmap으로 열어 그 버전에서 시작하는 Bank
+
+        add_rate는 파일 대신 메모리의 새 스냅샷에 쓴다 (copy-on-write).
+        """
+        return Bank(MappedSnapshot.open(path), history=history, rounding=rounding)
 
     def rate(self, from_currency: str, to_currency: str) -> int:
-        if from_currency == to_currency:
-            return 1
-        return self._rates[Pair(from_currency, to_currency)]
+        stats = self._stats
+        if stats is not None:
+            snapshot = self._snapshot
+            stats.record_rate(snapshot.is_indexed(from_currency, to_currency))
+            return snapshot.rate(from_currency, to_currency)
+        return self._snapshot.rate(from_currency, to_currency)
+
+
+# PinnedBank 클래스 - 스냅샷 하나에 고정된 읽기 전용 Bank
+class PinnedBank(Bank):
+    """스냅샷 하나와 반올림 모드만 드는 Bank - 락, 이력, 구독자가 없다
+
+    Bank.at()과 reduce가 축소 도중 환율이 바뀌지 않도록 넘기는 뷰다. 현재 버전의
+    뷰는 add_rate가 게시할 때 한 번 만들어 두므로 reduce마다 새로 만들지 않는다.
+    """
+
+    def __init__(
+        self,
+        snapshot: RateSnapshot,
+        rounding: str = ROUND_FLOOR,
+        stats: ReduceStats | None = None,
+    ) -> None:
+        self.rounding = rounding
+        self._snapshot = snapshot
+        self._stats = stats
+        self._cache: ReduceCache | None = None
+        self._hooked = stats is not None
+
+    def snapshot(self, version: int | None = None) -> RateSnapshot:
+        if version is None or version == self._snapshot.version:
+            return self._snapshot
+        raise KeyError(f"환율표 버전 {version}을 찾을 수 없습니다")
+
+    def at(self, version: int | None = None) -> PinnedBank:
+        self.snapshot(version)
+        return self
+
+    def _pin(
+        self, snapshot: RateSnapshot, stats: ReduceStats | None = None
+    ) -> PinnedBank:
+        if snapshot is self._snapshot and stats is self._stats:
+            return self
+        return PinnedBank(snapshot, self.rounding, stats)
+
+    def add_rate(self, from_currency: str, to_currency: str, rate: int) -> None:
+        raise TypeError("고정된 Bank에는 환율을 넣을 수 없습니다")
+
+    def subscribe(self, listener: RateListener) -> None:
+        raise TypeError("고정된 Bank는 환율이 바뀌지 않습니다")
+
+
+# reduce_many 워커 - 프로세스마다 한 번 받은 스냅샷으로 고정된 Bank
+_worker_bank: PinnedBank | None = None
+
+
+def _init_worker(snapshot: RateSnapshot, rounding: str) -> None:
+    global _worker_bank
+    _worker_bank = PinnedBank(snapshot, rounding)
+
+
+def _pack_chunk(sources: list[Expression]) -> tuple[int, bytes] | list[Expression]:
+    """묶음을 ((e1 + e2) + e3) + ... 모양의 트리 하나로 엮어 직렬화한 (개수, 바이트)"""
+    # serialization은 currency를 import하므로 여기서 늦게 import한다
+    from part01.ch16 import serialization
+
+    spine = sources[0]
+    for source in sources[1:]:
+        spine = Sum(spine, source)
+    try:
+        return len(sources), serialization.dumps(spine)
+    except TypeError:
+        return sources
+
+
+def _unpack_chunk(packed: tuple[int, bytes] | list[Expression]) -> list[Expression]:
+    if type(packed) is list:
+        return packed
+    from part01.ch16 import serialization
+
+    count, data = packed
+    node = serialization.loads(data)
+    # 엮은 Sum만 count - 1개 벗긴다 - 입력 Expression 자체가 Sum이어도 섞이지 않는다
+    sources = []
+    for _ in range(count - 1):
+        sources.append(node.addend)
+        node = node.augend
+    sources.append(node)
+    sources.reverse()
+    return sources
+
+
+def _reduce_in_worker(
+    packed: tuple[int, bytes] | list[Expression], to_currency: str
+) -> list[int]:
+    # 금액만 돌려보내고 Money는 부모 프로세스에서 만든다
+    return [
+        source._reduce_amount(_worker_bank, to_currency)
+        for source in _unpack_chunk(packed)
+    ]
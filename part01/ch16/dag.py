@@ -0,0 +1,142 @@
+"""Expression DAG - 구조가 같은 부분 트리를 하나로 합쳐 한 번씩만 축소한다
+
+계좌마다 같은 수수료 표가 반복되는 포트폴리오처럼 같은 모양의 Sum이 많을 때 쓴다.
+Money마다 반올림하므로 Sum의 축소 값은 두 자식의 축소 값을 더한 것과 같고, 그래서
+공유된 부분 트리의 값은 한 번만 구하면 된다. 값은 (환율 스냅샷, 반올림, 도착 통화)마다
+기억한다.
+"""
+
+from __future__ import annotations
+
+from collections import Counter, OrderedDict
+
+from part01.ch16.currency import (
+    Bank,
+    Buckets,
+    Expression,
+    Money,
+    RateSnapshot,
+    Sum,
+    collect_buckets,
+)
+
+# 기억해 둘 (스냅샷, 반올림, 도착 통화) 결과 수
+RESULTS_SIZE = 64
+
+
+def dedup(source: Expression) -> Expression:
+    """구조가 같은 부분 트리가 같은 객체를 가리키도록 다시 만든 Expression"""
+    return Dag(source).root
+
+
+class Dag(Expression):
+    """부분 트리를 공유하는 Expression과 자식부터 정렬한 고유 노드 목록"""
+
+    def __init__(self, source: Expression) -> None:
+        # 고유 노드를 자식이 부모보다 먼저 오도록 늘어놓는다
+        self._nodes: list[Expression] = []
+        self._children: list[tuple[int, int] | None] = []
+        self._results: OrderedDict[tuple[RateSnapshot, str, str], int] = OrderedDict()
+        index: dict[Expression, int] = {}
+        # 원래 노드 id -> 고유 노드 번호 (같은 객체를 여러 번 만나도 한 번만 처리)
+        seen: dict[int, int] = {}
+        stack: list[tuple[Expression, bool]] = [(source, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if id(node) in seen:
+                continue
+            if isinstance(node, Sum) and not expanded:
+                stack.append((node, True))
+                stack.append((node.addend, False))
+                stack.append((node.augend, False))
+                continue
+            original = node
+            if isinstance(node, Sum):
+                augend = seen[id(node.augend)]
+                addend = seen[id(node.addend)]
+                # 자식이 이미 고유 노드이므로 구조 비교는 자식의 동일성 비교로 끝난다
+                node = Sum(self._nodes[augend], self._nodes[addend])
+                children: tuple[int, int] | None = (augend, addend)
+            else:
+                children = None
+            unique = index.get(node)
+            if unique is None:
+                unique = index[node] = len(self._nodes)
+                self._nodes.append(node)
+                self._children.append(children)
+            seen[id(original)] = unique
+        self._root = seen[id(source)]
+        self.root = self._nodes[self._root]
+
+    def __len__(self) -> int:
+        """고유 노드 수"""
+        return len(self._nodes)
+
+    def __repr__(self) -> str:
+        return f"Dag({len(self)} nodes)"
+
+    def __reduce__(self) -> tuple[type[Dag], tuple[Expression]]:
+        # root만 보내 다시 만든다 - 고유 노드마다 부분 트리를 따로 펼치지 않도록
+        return Dag, (self.root,)
+
+    def reduce(self, bank: Bank, to_currency: str) -> Money:
+        return Money.of(self._reduce_amount(bank, to_currency), to_currency)
+
+    def _reduce_amount(self, bank: Bank, to_currency: str) -> int:
+        snapshot = bank.snapshot()
+        key = (snapshot, bank.rounding, to_currency)
+        amount = self._results.get(key)
+        if amount is None:
+            # 키로 쓴 스냅샷으로 고정해서 잎을 축소한다 - 통계와 행렬 백엔드는 그대로
+            pinned = bank._pin(snapshot, bank._stats)
+            amount = self._reduce_nodes(pinned, to_currency)
+            self._results[key] = amount
+            if len(self._results) > RESULTS_SIZE:
+                self._results.popitem(last=False)
+        else:
+            self._results.move_to_end(key)
+        return amount
+
+    def _reduce_nodes(self, bank: Bank, to_currency: str) -> int:
+        values = [0] * len(self._nodes)
+        for position, (node, children) in enumerate(
+            zip(self._nodes, self._children, strict=True)
+        ):
+            if children is None:
+                values[position] = node._reduce_amount(bank, to_currency)
+            else:
+                values[position] = values[children[0]] + values[children[1]]
+        return values[self._root]
+
+    def plus(self, addend: Expression) -> Expression:
+        return Sum(self, addend)
+
+    def times(self, multiplier: int) -> Expression:
+        return Dag(self.root.times(multiplier))
+
+    def _accumulate(self, buckets: Buckets, stack: list[Expression]) -> None:
+        # 공유된 부분 트리를 다시 펼치지 않는다 - 부모부터 내려가며 노드마다 root에서
+        # 몇 번 닿는지 세고, 잎의 금액을 그 횟수만큼 버킷에 더한다
+        counts = [0] * len(self._nodes)
+        counts[self._root] = 1
+        for position in range(self._root, -1, -1):
+            count = counts[position]
+            if not count:
+                continue
+            children = self._children[position]
+            if children is not None:
+                counts[children[0]] += count
+                counts[children[1]] += count
+                continue
+            node = self._nodes[position]
+            part = (
+                {node._currency: Counter({node._amount: 1})}
+                if type(node) is Money
+                else collect_buckets(node)
+            )
+            for currency, amounts in part.items():
+                bucket = buckets.get(currency)
+                if bucket is None:
+                    bucket = buckets[currency] = Counter()
+                for amount, times in amounts.items():
+                    bucket[amount] += times * count
@@ -0,0 +1,92 @@
+"""증분 축소 - 환율이 바뀔 때 영향을 받는 통화 버킷만 다시 환산한다
+
+대시보드처럼 같은 포트폴리오 수천 개를 계속 보여 줄 때, 환율 하나가 바뀌었다고
+모든 트리를 처음부터 reduce하지 않는다.
+"""
+
+from __future__ import annotations
+
+import threading
+
+from part01.ch16.currency import (
+    Bank,
+    Expression,
+    Money,
+    RateSnapshot,
+    collect_buckets,
+    convert_buckets,
+)
+
+
+class IncrementalReduction:
+    """통화별 소계를 기억하고 Bank의 환율 변경을 구독하는 축소 결과
+
+    with 문으로 쓰거나 다 쓴 뒤 close()를 호출해 구독을 끊는다.
+    """
+
+    def __init__(self, source: Expression, bank: Bank, to_currency: str) -> None:
+        self._bank = bank
+        self._to_currency = to_currency
+        self._buckets = collect_buckets(source)
+        self._rates: dict[str, int] = {}
+        self._subtotals: dict[str, int] = {}
+        self._total = 0
+        self._version = -1
+        self._lock = threading.Lock()
+        # 먼저 구독하고 나서 현재 스냅샷을 읽는다 - 그 사이에 들어온 환율도 놓치지 않고,
+        # 이미 반영한 버전의 알림은 _refresh가 버린다
+        bank.subscribe(self._on_rate)
+        try:
+            self._refresh(bank.snapshot())
+        except BaseException:
+            bank.unsubscribe(self._on_rate)
+            raise
+
+    def __enter__(self) -> IncrementalReduction:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._bank.unsubscribe(self._on_rate)
+
+    @property
+    def version(self) -> int:
+        """마지막으로 반영한 환율표 버전"""
+        return self._version
+
+    def value(self) -> Money:
+        return Money.of(self._total, self._to_currency)
+
+    def _on_rate(
+        self, snapshot: RateSnapshot, from_currency: str, to_currency: str
+    ) -> None:
+        # 바뀐 환율이 다른 통화의 경유 경로에 있을 수도 있으므로 모든 통화의 환율을
+        # 색인에서 다시 읽되, 실제로 달라진 통화의 버킷만 다시 환산한다
+        self._refresh(snapshot)
+
+    def _refresh(self, snapshot: RateSnapshot) -> None:
+        with self._lock:
+            if snapshot.version > self._version:
+                self._apply(snapshot)
+
+    def _apply(self, snapshot: RateSnapshot) -> None:
+        # 모두 계산한 뒤에 바꾼다 - 도중에 실패하면 이전 버전의 값이 그대로 남는다
+        rates = dict(self._rates)
+        subtotals = dict(self._subtotals)
+        total = self._total
+        for currency, bucket in self._buckets.items():
+            rate = snapshot.rate(currency, self._to_currency)
+            if rates.get(currency) == rate:
+                continue
+            subtotal = convert_buckets(
+                {currency: bucket}, {currency: rate}, self._bank.rounding
+            )
+            total += subtotal - subtotals.get(currency, 0)
+            subtotals[currency] = subtotal
+            rates[currency] = rate
+        self._rates = rates
+        self._subtotals = subtotals
+        self._total = total
+        self._version = snapshot.version
@@ -0,0 +1,57 @@
+"""축소 계측 - Bank.reduce와 환율 조회의 통계
+
+Bank.enable_stats()로 켤 때만 쓰인다. 꺼져 있을 때 Bank가 치르는 비용은
+reduce/rate 호출마다 속성 하나를 확인하는 것뿐이다.
+"""
+
+from __future__ import annotations
+
+import threading
+
+# 지연 히스토그램 구간 - i번째 칸은 2**i 마이크로초 미만, 마지막 칸은 그 이상 전부
+LATENCY_BUCKETS = 24
+
+
+class ReduceStats:
+    """reduce 호출 수, 방문 노드 수, 환율 색인 적중/실패, 지연 히스토그램"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reduce_calls = 0
+        self.nodes_visited = 0
+        self.rate_hits = 0
+        self.rate_misses = 0
+        self.latency = [0] * LATENCY_BUCKETS
+
+    def record_reduce(self, nodes: int, seconds: float) -> None:
+        bucket = min(int(seconds * 1_000_000).bit_length(), LATENCY_BUCKETS - 1)
+        with self._lock:
+            self.reduce_calls += 1
+            self.nodes_visited += nodes
+            self.latency[bucket] += 1
+
+    def record_rate(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.rate_hits += 1
+            else:
+                self.rate_misses += 1
+
+    def snapshot(self) -> dict[str, object]:
+        """현재 통계를 dict로 복사한다 - latency_us는 {"<상한": 개수}"""
+        with self._lock:
+            calls = self.reduce_calls
+            labels = [f"<{2**i}" for i in range(LATENCY_BUCKETS - 1)]
+            labels.append(f">={2 ** (LATENCY_BUCKETS - 2)}")
+            return {
+                "reduce_calls": calls,
+                "nodes_visited": self.nodes_visited,
+                "nodes_per_reduce": self.nodes_visited / calls if calls else 0.0,
+                "rate_hits": self.rate_hits,
+                "rate_misses": self.rate_misses,
+                "latency_us": {
+                    label: count
+                    for label, count in zip(labels, self.latency, strict=True)
+                    if count
+                },
+            }
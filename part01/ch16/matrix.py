@@ -0,0 +1,229 @@
+"""환율 행렬 - 통화 ID로 색인하는 N×N 밀집 행렬과 일괄 환산
+
+통화 수가 고정되어 있고(약 150개) 환산이 수억 번 일어나는 배치 작업용이다.
+MatrixBank의 rate()와 reduce는 스냅샷 대신 행렬의 칸 하나를 읽는다. 행렬은 버전마다
+처음 환율을 물을 때 한 번 만들고(N² 칸) 최근 몇 버전만 기억하므로 환율이 자주 바뀌는
+표에는 Bank가 낫다.
+convert_many는 도착 통화의 열 하나를 꺼내 금액 배열 전체를 한 번에 환산한다.
+"""
+
+from __future__ import annotations
+
+import threading
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterable
+
+from part01.ch16.currency import (
+    ROUND_FLOOR,
+    Bank,
+    PinnedBank,
+    RateSnapshot,
+    divide,
+)
+from part01.ch16.instrumentation import ReduceStats
+
+# 버전마다 기억해 둘 행렬 수 - 고정 뷰와 현재 Bank가 번갈아 물어도 다시 만들지 않도록
+MATRICES = 4
+# int64를 넘는 환율의 칸 - 정확한 값은 RateMatrix.bigs에 있다
+BIG_RATE = -1
+
+
+class RateMatrix:
+    """cells[from_id * size + to_id] = 환율, 0은 환율 없음, BIG_RATE는 bigs에 있음"""
+
+    def __init__(self, codes: list[str], snapshot: RateSnapshot) -> None:
+        self.codes = list(codes)
+        self.ids = {code: i for i, code in enumerate(self.codes)}
+        self.size = len(self.codes)
+        self.version = snapshot.version
+        self.bigs: dict[int, int] = {}
+        size = self.size
+        self.cells = array("q", bytes(8 * size * size))
+        for from_id, from_currency in enumerate(self.codes):
+            row = from_id * size
+            for to_id, to_currency in enumerate(self.codes):
+                try:
+                    rate = snapshot.rate(from_currency, to_currency)
+                except KeyError:
+                    continue
+                try:
+                    self.cells[row + to_id] = rate
+                except OverflowError:
+                    self.cells[row + to_id] = BIG_RATE
+                    self.bigs[row + to_id] = rate
+
+    def rate(self, from_id: int, to_id: int) -> int:
+        index = from_id * self.size + to_id
+        rate = self.cells[index]
+        if rate > 0:
+            return rate
+        if rate == BIG_RATE:
+            return self.bigs[index]
+        raise KeyError((self.codes[from_id], self.codes[to_id]))
+
+    def lookup(self, from_currency: str, to_currency: str) -> int:
+        """통화 코드로 찾는 환율 - 행렬에 없는 통화나 빈 칸이면 KeyError"""
+        if from_currency == to_currency:
+            return 1
+        try:
+            index = self.ids[from_currency] * self.size + self.ids[to_currency]
+        except KeyError:
+            raise KeyError((from_currency, to_currency)) from None
+        rate = self.cells[index]
+        if rate > 0:
+            return rate
+        if rate == BIG_RATE:
+            return self.bigs[index]
+        raise KeyError((from_currency, to_currency))
+
+    def column(self, to_id: int) -> array | list[int]:
+        """모든 통화에서 to_id로 가는 환율 - column[from_id]
+
+        int64를 넘는 환율이 있는 열은 정확한 값을 담은 list로 돌려준다.
+        """
+        column = self.cells[to_id :: self.size]
+        if self.bigs and BIG_RATE in column:
+            return [
+                self.bigs[from_id * self.size + to_id] if rate == BIG_RATE else rate
+                for from_id, rate in enumerate(column)
+            ]
+        return column
+
+
+class MatrixBank(Bank):
+    """환율을 통화 ID 행렬로 읽는 Bank
+
+    rate()와 reduce는 행렬에서 환율을 읽고, at()은 같은 행렬을 쓰는 PinnedMatrixBank를
+    돌려준다. currencies로 ID 순서를 미리 정할 수 있고, add_rate에 처음 나온 통화는
+    뒤에 붙는다.
+    """
+
+    def __init__(
+        self,
+        currencies: Iterable[str] = (),
+        history: int = 1024,
+        rounding: str = ROUND_FLOOR,
+    ) -> None:
+        # Bank.__init__이 고정 뷰를 만들 때 쓰므로 먼저 둔다
+        self._codes: list[str] = []
+        self._ids: dict[str, int] = {}
+        self._matrix: RateMatrix | None = None
+        self._matrices: OrderedDict[int, RateMatrix] = OrderedDict()
+        self._matrices_lock = threading.Lock()
+        super().__init__(history=history, rounding=rounding)
+        for currency in currencies:
+            self.currency_id(currency)
+
+    def currency_id(self, currency: str) -> int:
+        currency_id = self._ids.get(currency)
+        if currency_id is None:
+            with self._lock:
+                currency_id = self._ids.get(currency)
+                if currency_id is None:
+                    currency_id = len(self._codes)
+                    self._codes.append(currency)
+                    self._ids[currency] = currency_id
+        return currency_id
+
+    def currencies(self) -> list[str]:
+        return list(self._codes)
+
+    def add_rate(self, from_currency: str, to_currency: str, rate: int) -> None:
+        self.currency_id(from_currency)
+        self.currency_id(to_currency)
+        super().add_rate(from_currency, to_currency, rate)
+
+    def matrix(self) -> RateMatrix:
+        """고정된 스냅샷(Bank는 현재 스냅샷)의 환율 행렬"""
+        return self._matrix_for(self._snapshot)
+
+    def _matrix_for(self, snapshot: RateSnapshot) -> RateMatrix:
+        # 마지막에 쓴 행렬은 락 없이 확인하고, 아니면 버전별 LRU에서 찾는다.
+        # 통화 수가 바뀐 행렬은 다시 만든다.
+        size = len(self._codes)
+        matrix = self._matrix
+        if matrix is not None and matrix.version == snapshot.version:
+            if matrix.size == size:
+                return matrix
+        with self._matrices_lock:
+            matrix = self._matrices.get(snapshot.version)
+            if matrix is not None and matrix.size == size:
+                self._matrices.move_to_end(snapshot.version)
+                self._matrix = matrix
+                return matrix
+        matrix = RateMatrix(self._codes, snapshot)
+        with self._matrices_lock:
+            self._matrices[snapshot.version] = matrix
+            self._matrices.move_to_end(snapshot.version)
+            if len(self._matrices) > MATRICES:
+                self._matrices.popitem(last=False)
+        self._matrix = matrix
+        return matrix
+
+    def _pin(
+        self, snapshot: RateSnapshot, stats: ReduceStats | None = None
+    ) -> PinnedMatrixBank:
+        return PinnedMatrixBank(self, snapshot, stats)
+
+    def rate(self, from_currency: str, to_currency: str) -> int:
+        stats = self._stats
+        if stats is not None:
+            stats.record_rate(True)
+        return self.matrix().lookup(from_currency, to_currency)
+
+    def convert_many(
+        self, amounts: Iterable[int], from_ids: Iterable[int], to_id: int
+    ) -> array:
+        """amounts[i]를 from_ids[i] 통화에서 to_id 통화로 환산한 int64 배열"""
+        matrix = self.matrix()
+        column = matrix.column(to_id)
+        amounts = array("q", amounts)
+        from_ids = array("I", from_ids)
+        if len(amounts) != len(from_ids):
+            raise ValueError("금액과 통화 ID의 개수가 다릅니다")
+        for from_id in set(from_ids):
+            if column[from_id] == 0:
+                raise KeyError((matrix.codes[from_id], matrix.codes[to_id]))
+        rounding = self.rounding
+        if rounding == ROUND_FLOOR:
+            return array(
+                "q",
+                [
+                    amount // column[from_id]
+                    for amount, from_id in zip(amounts, from_ids, strict=True)
+                ],
+            )
+        return array(
+            "q",
+            [
+                divide(amount, column[from_id], rounding)
+                for amount, from_id in zip(amounts, from_ids, strict=True)
+            ],
+        )
+
+
+class PinnedMatrixBank(PinnedBank, MatrixBank):
+    """스냅샷 하나에 고정된 읽기 전용 MatrixBank - 통화 ID와 행렬은 원래 Bank와 공유"""
+
+    def __init__(
+        self,
+        owner: MatrixBank,
+        snapshot: RateSnapshot,
+        stats: ReduceStats | None = None,
+    ) -> None:
+        super().__init__(snapshot, owner.rounding, stats)
+        self._owner = owner
+        self._lock = owner._lock
+        self._codes = owner._codes
+        self._ids = owner._ids
+
+    def _matrix_for(self, snapshot: RateSnapshot) -> RateMatrix:
+        return self._owner._matrix_for(snapshot)
+
+    def _pin(
+        self, snapshot: RateSnapshot, stats: ReduceStats | None = None
+    ) -> PinnedMatrixBank:
+        if snapshot is self._snapshot and stats is self._stats:
+            return self
+        return PinnedMatrixBank(self._owner, snapshot, stats)
@@ -0,0 +1,91 @@
+"""환율 스냅샷 파일 - 고정 레이아웃 이진 파일과 mmap 읽기
+
+    header    magic b"MNYRATE1", 버전 int64, 통화 수 N uint32, 예약 uint32
+    codes     통화마다 CODE_SIZE 바이트 (UTF-8, 뒤는 0으로 채움)
+    direct    N×N int64 - 등록된 직접 환율, 0은 없음
+    resolved  N×N int64 - 경로 탐색까지 마친 환율, 0은 닿지 않음
+
+모두 리틀 엔디언이고 행렬은 8바이트 경계에서 시작한다. [from * N + to] 칸이
+from → to 환율이다. 파일은 읽기 전용 mmap으로 열므로 같은 파일을 연 프로세스들은
+페이지 캐시를 함께 쓴다.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+MAGIC = b"MNYRATE1"
+HEADER = struct.Struct("<8sqII")
+CODE_SIZE = 16
+
+
+def write_rate_file(
+    path: str | Path,
+    version: int,
+    codes: list[str],
+    direct: array,
+    resolved: array,
+) -> None:
+    """환율 파일을 쓴다 - 임시 파일에 쓰고 바꿔 넣으므로 반쯤 쓴 파일은 보이지 않는다"""
+    size = len(codes)
+    if len(direct) != size * size or len(resolved) != size * size:
+        raise ValueError("환율 행렬의 크기가 통화 수와 맞지 않습니다")
+    table = bytearray()
+    for code in codes:
+        raw = code.encode()
+        if len(raw) > CODE_SIZE:
+            raise ValueError(f"통화 코드가 너무 깁니다: {code}")
+        table += raw.ljust(CODE_SIZE, b"\0")
+    if sys.byteorder == "big":
+        direct = array("q", direct)
+        direct.byteswap()
+        resolved = array("q", resolved)
+        resolved.byteswap()
+    path = Path(path)
+    temporary = path.with_name(path.name + ".tmp")
+    with open(temporary, "wb") as file:
+        file.write(HEADER.pack(MAGIC, version, size, 0))
+        file.write(table)
+        direct.tofile(file)
+        resolved.tofile(file)
+    os.replace(temporary, path)
+
+
+class RateFile:
+    """읽기 전용 mmap으로 연 환율 파일"""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < HEADER.size:
+                raise ValueError("환율 파일이 아닙니다")
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.version, size, _ = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError("환율 파일이 아닙니다")
+        matrix = 8 * size * size
+        start = HEADER.size + CODE_SIZE * size
+        if len(self._mmap) != start + 2 * matrix:
+            raise ValueError("환율 파일이 잘렸습니다")
+        self.codes: list[str] = []
+        for offset in range(HEADER.size, start, CODE_SIZE):
+            raw = self._mmap[offset : offset + CODE_SIZE].rstrip(b"\0")
+            self.codes.append(sys.intern(raw.decode()))
+        self.ids = {code: i for i, code in enumerate(self.codes)}
+        self.size = size
+        view = memoryview(self._mmap)
+        self.direct = _column(view[start : start + matrix])
+        self.resolved = _column(view[start + matrix : start + 2 * matrix])
+
+
+def _column(view: memoryview) -> memoryview:
+    if sys.byteorder == "big":
+        values = array("q", view)
+        values.byteswap()
+        return memoryview(values)
+    return view.cast("q")
@@ -0,0 +1,265 @@
+"""Expression 트리와 MoneyBatch의 이진 직렬화
+
+pickle보다 작고 빠르게, 그리고 재귀 없이 깊은 Sum 트리도 다룬다.
+
+    magic     b"MNY1"
+    codes     varint 개수, (varint 길이, UTF-8 바이트) * 개수
+    ops       varint 개수, 노드 종류 1바이트 * 개수 (후위 순회 순서)
+    sizes     varint 개수, MoneyBatch마다 varint 행 수, 배치 통화 수 k,
+              배치 통화의 통화 표 인덱스 k개
+              (큰 행이 있는 배치는 뒤에 varint 큰 행 수가 하나 더 붙는다)
+    bigs      varint 개수, int64를 넘는 금액마다 zigzag varint
+              (배치의 큰 행은 행 번호, 금액 순으로 두 칸씩)
+    leaves    varint 행 수, 8바이트 경계까지 0 채움,
+              금액 int64 * 행 수, 통화 인덱스 uint32 * 행 수 (리틀 엔디언)
+
+잎(Money, MoneyBatch의 행)은 금액/통화 열에 차례로 한 칸씩 차지한다. Money 행의
+통화 인덱스는 통화 표를, 배치 행의 인덱스는 그 배치의 통화 목록을 가리키므로 배치
+열은 행마다 바꾸지 않고 통째로 옮긴다. loads는 memoryview 위에서 열을 cast로 보고,
+Money는 거기서 바로 읽으며 배치는 열 조각을 배열에 한 번씩 복사(memcpy)한다.
+"""
+
+from __future__ import annotations
+
+import sys
+from array import array
+
+from part01.ch16.batch import INT64_MAX, INT64_MIN, MoneyBatch
+from part01.ch16.currency import Expression, Money, Sum
+
+MAGIC = b"MNY1"
+
+# 노드 종류
+MONEY = 0
+SUM = 1
+BATCH = 2
+BIG_MONEY = 3  # int64 범위를 넘는 금액의 Money
+BIG_BATCH = 4  # int64 범위를 넘는 행이 있는 MoneyBatch
+
+
+def dumps(source: Expression) -> bytes:
+    codes: list[str] = []
+    code_ids: dict[str, int] = {}
+    ops = bytearray()
+    sizes: list[int] = []
+    bigs: list[int] = []
+    # 금액/통화 열 조각 - Money 행은 amounts/ids에 모으고 배치 열은 그대로 끼워 둔다
+    amount_parts: list[array] = []
+    id_parts: list[array] = []
+    amounts = array("q")
+    ids = array("I")
+
+    def code_id(currency: str) -> int:
+        found = code_ids.get(currency)
+        if found is None:
+            found = code_ids[currency] = len(codes)
+            codes.append(currency)
+        return found
+
+    # 후위 순회 - (노드, 자식을 이미 내보냈는지)
+    stack: list[tuple[Expression, bool]] = [(source, False)]
+    push = stack.append
+    pop = stack.pop
+    add_op = ops.append
+    add_amount = amounts.append
+    add_id = ids.append
+    while stack:
+        node, expanded = pop()
+        kind = type(node)
+        if kind is Sum:
+            if expanded:
+                add_op(SUM)
+            else:
+                push((node, True))
+                push((node.addend, False))
+                push((node.augend, False))
+        elif kind is Money:
+            amount = node._amount
+            if INT64_MIN <= amount <= INT64_MAX:
+                add_op(MONEY)
+                add_amount(amount)
+            else:
+                add_op(BIG_MONEY)
+                add_amount(0)
+                bigs.append(amount)
+            add_id(code_id(node._currency))
+        elif kind is MoneyBatch:
+            add_op(BIG_BATCH if node._bigs else BATCH)
+            sizes.append(len(node))
+            sizes.append(len(node._codes))
+            sizes.extend(code_id(code) for code in node._codes)
+            if node._bigs:
+                sizes.append(len(node._bigs))
+                for row, amount in node._bigs.items():
+                    bigs.append(row)
+                    bigs.append(amount)
+            # 배치 열은 배치 통화 목록 기준 인덱스 그대로 - 행마다 바꾸지 않는다
+            amount_parts += (amounts, node._amounts)
+            id_parts += (ids, node._ids)
+            amounts = array("q")
+            ids = array("I")
+            add_amount = amounts.append
+            add_id = ids.append
+        else:
+            raise TypeError(f"직렬화할 수 없는 Expression입니다: {kind.__name__}")
+
+    out = bytearray(MAGIC)
+    _write_varint(out, len(codes))
+    for currency in codes:
+        raw = currency.encode()
+        _write_varint(out, len(raw))
+        out += raw
+    _write_varint(out, len(ops))
+    out += ops
+    _write_varint(out, len(sizes))
+    for size in sizes:
+        _write_varint(out, size)
+    _write_varint(out, len(bigs))
+    for amount in bigs:
+        _write_varint(out, _zigzag(amount))
+    amount_parts.append(amounts)
+    id_parts.append(ids)
+    _write_varint(out, sum(map(len, amount_parts)))
+    out += bytes(-len(out) % 8)
+    if sys.byteorder == "big":
+        amount_parts = [_swapped(part) for part in amount_parts]
+        id_parts = [_swapped(part) for part in id_parts]
+    # 열 조각들은 마지막에 한 번만 이어 붙인다
+    return b"".join([out, *amount_parts, *id_parts])
+
+
+def loads(data: bytes | bytearray | memoryview) -> Expression:
+    view = memoryview(data).cast("B")
+    if bytes(view[:4]) != MAGIC:
+        raise ValueError("직렬화된 Expression이 아닙니다")
+    pos = 4
+    count, pos = _read_varint(view, pos)
+    codes = []
+    for _ in range(count):
+        length, pos = _read_varint(view, pos)
+        codes.append(sys.intern(str(view[pos : pos + length], "utf-8")))
+        pos += length
+    count, pos = _read_varint(view, pos)
+    ops = view[pos : pos + count]
+    pos += count
+    count, pos = _read_varint(view, pos)
+    sizes = []
+    for _ in range(count):
+        size, pos = _read_varint(view, pos)
+        sizes.append(size)
+    count, pos = _read_varint(view, pos)
+    bigs = []
+    for _ in range(count):
+        value, pos = _read_varint(view, pos)
+        bigs.append(_unzigzag(value))
+    rows, pos = _read_varint(view, pos)
+    pos += -pos % 8
+    if pos + rows * 12 > len(view):
+        raise ValueError("직렬화된 데이터가 잘렸습니다")
+    amounts = _column(view, pos, rows, "q")
+    ids = _column(view, pos + rows * 8, rows, "I")
+
+    # 손상된 입력은 모두 ValueError로 - 빈 스택, 모자란 sizes/bigs, 범위 밖 인덱스
+    stack: list[Expression] = []
+    leaf = 0
+    size_iter = iter(sizes)
+    big_iter = iter(bigs)
+    next_size = size_iter.__next__
+    next_big = big_iter.__next__
+    try:
+        for op in ops:
+            if op == MONEY:
+                stack.append(Money.of(amounts[leaf], codes[ids[leaf]]))
+                leaf += 1
+            elif op == SUM:
+                if len(stack) < 2:
+                    raise ValueError("직렬화된 트리가 올바르지 않습니다")
+                addend = stack.pop()
+                stack.append(Sum(stack.pop(), addend))
+            elif op == BATCH or op == BIG_BATCH:
+                size = next_size()
+                batch_codes = [codes[next_size()] for _ in range(next_size())]
+                if leaf + size > rows:
+                    raise ValueError("배치 행이 잎 열을 넘습니다")
+                batch = _batch(amounts, ids, batch_codes, leaf, size)
+                if op == BIG_BATCH:
+                    for _ in range(next_size()):
+                        row = next_big()
+                        if not 0 <= row < size:
+                            raise ValueError(f"배치에 없는 행입니다: {row}")
+                        batch._bigs[row] = next_big()
+                stack.append(batch)
+                leaf += size
+            elif op == BIG_MONEY:
+                stack.append(Money.of(next_big(), codes[ids[leaf]]))
+                leaf += 1
+            else:
+                raise ValueError(f"알 수 없는 노드 종류입니다: {op}")
+    except (IndexError, StopIteration):
+        raise ValueError("직렬화된 트리가 올바르지 않습니다") from None
+    if (
+        len(stack) != 1
+        or leaf != rows
+        or next(size_iter, None) is not None
+        or next(big_iter, None) is not None
+    ):
+        raise ValueError("직렬화된 트리가 올바르지 않습니다")
+    return stack[0]
+
+
+def _column(view: memoryview, pos: int, rows: int, typecode: str) -> memoryview:
+    width = 8 if typecode == "q" else 4
+    column = view[pos : pos + rows * width]
+    if sys.byteorder == "big":
+        values = array(typecode, column)
+        values.byteswap()
+        return memoryview(values)
+    return column.cast(typecode)
+
+
+def _swapped(values: array) -> array:
+    values = array(values.typecode, values)
+    values.byteswap()
+    return values
+
+
+def _batch(
+    amounts: memoryview, ids: memoryview, codes: list[str], start: int, size: int
+) -> MoneyBatch:
+    # 열 조각을 배열로 한 번씩 복사한다 - 행마다 도는 파이썬 루프는 없다
+    batch_amounts = array("q")
+    batch_amounts.frombytes(amounts[start : start + size].cast("B"))
+    batch_ids = array("I")
+    batch_ids.frombytes(ids[start : start + size].cast("B"))
+    if batch_ids and max(batch_ids) >= len(codes):
+        raise ValueError("배치 통화 인덱스가 통화 목록을 넘습니다")
+    return MoneyBatch._from_columns(batch_amounts, batch_ids, codes)
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(view: memoryview, pos: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(view):
+            raise ValueError("직렬화된 데이터가 잘렸습니다")
+        byte = view[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
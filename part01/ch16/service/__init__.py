@@ -0,0 +1,5 @@
+# service 패키지 - Unix 소켓 포트폴리오 집계 서버
+from part01.ch16.service.client import Client
+from part01.ch16.service.server import AggregationServer
+
+__all__ = ["AggregationServer", "Client"]
@@ -0,0 +1,49 @@
+"""집계 서버 실행과 벤치마크
+
+python -m part01.ch16.service serve /tmp/aggregate.sock --workers 4
+python -m part01.ch16.service bench --workers 8 --positions 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+
+from part01.ch16.service.loadgen import benchmark, rate_bank
+from part01.ch16.service.server import AggregationServer
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m part01.ch16.service")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="소켓 경로에서 요청을 받는다")
+    serve.add_argument("path")
+    serve.add_argument("--workers", type=int)
+
+    bench = commands.add_parser("bench", help="워커 1..N개의 처리량을 잰다")
+    bench.add_argument("--workers", type=int, default=4)
+    bench.add_argument("--positions", type=int, default=200_000)
+    bench.add_argument("--clients", type=int, default=4)
+    bench.add_argument("--batch", type=int, default=500)
+
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        with AggregationServer(args.path, rate_bank(), workers=args.workers):
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                pass
+        return 0
+
+    results = benchmark(args.workers, args.positions, args.clients, args.batch)
+    base = results[1]
+    for workers, throughput in results.items():
+        speedup = throughput / base
+        print(f"{workers:>3} workers{throughput:>16,.0f} positions/s{speedup:>8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""집계 서버 클라이언트 - 연결 하나로 줄 단위 JSON 요청을 차례로 보낸다"""
+
+from __future__ import annotations
+
+import json
+import socket
+from collections.abc import Iterable
+from pathlib import Path
+
+from part01.ch16.currency import Money
+
+# 서버가 돌려준 오류 이름 -> 클라이언트에서 다시 올릴 예외
+_ERRORS: dict[str, type[Exception]] = {
+    "KeyError": KeyError,
+    "ValueError": ValueError,
+    "TypeError": TypeError,
+}
+
+
+class Client:
+    def __init__(self, path: str | Path) -> None:
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(str(path))
+        self._file = self._socket.makefile("rwb")
+
+    def __enter__(self) -> Client:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+    def add(self, positions: Iterable[tuple[str, int, str]]) -> int:
+        """(계좌, 금액, 통화) 포지션들을 보내고 서버가 쌓은 개수를 돌려받는다"""
+        rows = [
+            {"account": account, "amount": amount, "currency": currency}
+            for account, amount, currency in positions
+        ]
+        return self._call({"op": "add", "positions": rows})["added"]
+
+    def total(self, currency: str, account: str | None = None) -> Money:
+        request = {"op": "total", "currency": currency}
+        if account is not None:
+            request["account"] = account
+        return Money.of(self._call(request)["amount"], currency)
+
+    def add_rate(self, from_currency: str, to_currency: str, rate: int) -> int:
+        """서버의 Bank에 환율을 넣고 새 환율 버전을 돌려받는다"""
+        request = {"op": "rate", "from": from_currency, "to": to_currency, "rate": rate}
+        return self._call(request)["version"]
+
+    def _call(self, request: dict) -> dict:
+        self._file.write(json.dumps(request).encode() + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("서버가 연결을 끊었습니다")
+        reply = json.loads(line)
+        if not reply["ok"]:
+            raise _ERRORS.get(reply["error"], RuntimeError)(reply["message"])
+        return reply
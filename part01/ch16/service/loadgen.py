@@ -0,0 +1,85 @@
+"""부하 생성기와 워커 수별 처리량 벤치마크
+
+클라이언트마다 별도 프로세스에서 포지션을 만들어 batch개씩 보내고, 모든 클라이언트가
+보낸 포지션 수를 첫 시작부터 마지막 끝까지의 시간으로 나눠 처리량을 잰다.
+"""
+
+from __future__ import annotations
+
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from part01.ch16.currency import Bank
+from part01.ch16.service.client import Client
+from part01.ch16.service.server import AggregationServer, Position
+
+CURRENCIES = ("USD", "CHF", "EUR", "GBP", "JPY")
+
+
+def generate_positions(
+    count: int, accounts: int = 1000, seed: int = 0
+) -> list[Position]:
+    """(계좌, 금액, 통화) 포지션 count개 - 금액은 1~10000, 같은 seed면 같은 결과"""
+    rng = random.Random(seed)
+    return [
+        (
+            f"acct-{rng.randrange(accounts)}",
+            rng.randint(1, 10_000),
+            rng.choice(CURRENCIES),
+        )
+        for _ in range(count)
+    ]
+
+
+def _send(path: str, count: int, batch: int, seed: int) -> tuple[float, float, int]:
+    # 클라이언트 프로세스 - 포지션을 미리 만들어 두고 보내는 구간만 잰다
+    positions = generate_positions(count, seed=seed)
+    with Client(path) as client:
+        start = time.monotonic()
+        sent = 0
+        for offset in range(0, count, batch):
+            sent += client.add(positions[offset : offset + batch])
+        return start, time.monotonic(), sent
+
+
+def run_load(
+    path: str | Path, positions: int, clients: int = 4, batch: int = 500
+) -> float:
+    """clients개 프로세스가 positions개를 나눠 보낸다 - 초당 포지션 수"""
+    share = positions // clients
+    with ProcessPoolExecutor(max_workers=clients) as pool:
+        results = list(
+            pool.map(
+                _send,
+                [str(path)] * clients,
+                [share] * clients,
+                [batch] * clients,
+                range(clients),
+            )
+        )
+    start = min(result[0] for result in results)
+    end = max(result[1] for result in results)
+    return sum(result[2] for result in results) / (end - start)
+
+
+def rate_bank() -> Bank:
+    bank = Bank()
+    for currency, rate in zip(CURRENCIES[1:], (2, 3, 4, 5), strict=True):
+        bank.add_rate(currency, "USD", rate)
+    return bank
+
+
+def benchmark(
+    max_workers: int, positions: int = 200_000, clients: int = 4, batch: int = 500
+) -> dict[int, float]:
+    """워커 수 1..max_workers마다 새 서버를 띄워 run_load한 처리량"""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "aggregate.sock"
+        for workers in range(1, max_workers + 1):
+            with AggregationServer(path, rate_bank(), workers=workers):
+                results[workers] = run_load(path, positions, clients, batch)
+    return results
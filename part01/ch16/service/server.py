@@ -0,0 +1,335 @@
+"""포트폴리오 집계 서버 - 워커 프로세스들이 Unix 소켓에서 직접 포지션을 받아 합산한다
+
+프로토콜은 줄 단위 JSON이다. 요청 한 줄에 응답 한 줄이 돌아온다.
+
+    {"op": "add", "positions": [{"account": "a1", "amount": 500, "currency": "USD"}]}
+        -> {"ok": true, "added": 1}
+    {"op": "total", "currency": "USD"}                 (account를 주면 그 계좌만)
+        -> {"ok": true, "amount": 1234, "currency": "USD", "version": 3}
+    {"op": "rate", "from": "CHF", "to": "USD", "rate": 2}
+        -> {"ok": true, "version": 4}
+    실패하면 {"ok": false, "error": "KeyError", "message": "..."}
+
+요청은 JSON 객체여야 하고 account/currency/from/to는 문자열, amount/rate는 정수
+(최소 단위)여야 한다. 어긋나면 TypeError 응답을 보내고 연결은 그대로 둔다.
+
+서버 프로세스는 소켓을 열어 두기만 하고, 그 소켓을 물려받은 워커 프로세스들이 각자
+연결을 accept해 파싱, 검사, 버킷 쌓기까지 한다. 그래서 포지션은 그 연결을 받은 워커에
+쌓인다. total과 rate만 서버 프로세스로 넘어간다. 서버는 각 샤드에 통화 목록을 물어
+환율표를 만들고, 샤드마다 그 환율로 환산한 통화별 정수만 돌려받아 더한다. 포지션마다
+반올림하므로 결과는 포지션을 모은 Sum을 reduce한 값과 같다.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import threading
+from collections import Counter
+from multiprocessing.connection import Connection
+from pathlib import Path
+
+from part01.ch16.currency import Bank, Buckets, convert_buckets
+
+Position = tuple[str, int, str]
+
+
+def _field(record: dict, name: str, kind: type) -> object:
+    """record[name] - 없으면 KeyError, 타입이 다르면 TypeError (bool은 정수가 아니다)"""
+    value = record[name]
+    if type(value) is not kind:
+        raise TypeError(f"{name}은(는) {kind.__name__}이어야 합니다: {value!r}")
+    return value
+
+
+def _failure(error: Exception) -> dict:
+    return {"ok": False, "error": type(error).__name__, "message": str(error)}
+
+
+class _Buckets:
+    """워커 하나의 계좌별 버킷과 샤드 전체 버킷 - 연결 스레드들이 락으로 나눠 쓴다"""
+
+    def __init__(self) -> None:
+        self.accounts: dict[str, Buckets] = {}
+        self.totals: Buckets = {}
+        self.lock = threading.Lock()
+
+    def add(self, rows: list[Position]) -> None:
+        with self.lock:
+            for account, amount, currency in rows:
+                buckets = self.accounts.get(account)
+                if buckets is None:
+                    buckets = self.accounts[account] = {}
+                bucket = buckets.get(currency)
+                if bucket is None:
+                    bucket = buckets[currency] = Counter()
+                bucket[amount] += 1
+                bucket = self.totals.get(currency)
+                if bucket is None:
+                    bucket = self.totals[currency] = Counter()
+                bucket[amount] += 1
+
+    def of(self, account: str | None) -> Buckets:
+        return self.totals if account is None else self.accounts.get(account, {})
+
+    def currencies(self, account: str | None) -> list[str]:
+        with self.lock:
+            return list(self.of(account))
+
+    def convert(
+        self, account: str | None, rates: dict[str, int], rounding: str
+    ) -> dict[str, int]:
+        """통화별 환산 합계 - 환율표를 만든 뒤 처음 들어온 통화는 다음 질의부터 센다"""
+        with self.lock:
+            return {
+                currency: convert_buckets({currency: bucket}, rates, rounding)
+                for currency, bucket in self.of(account).items()
+                if currency in rates
+            }
+
+    def copy(self, account: str | None) -> Buckets:
+        with self.lock:
+            return {
+                currency: bucket.copy() for currency, bucket in self.of(account).items()
+            }
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: _SocketServer
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                reply = self.server.handle(json.loads(line))
+            except (KeyError, ValueError, TypeError) as error:
+                reply = _failure(error)
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+
+class _SocketServer(socketserver.ThreadingUnixStreamServer):
+    """워커 프로세스 안의 서버 - add는 직접 쌓고 total/rate는 서버 프로세스에 묻는다"""
+
+    daemon_threads = True
+
+    def __init__(
+        self, listener: socket.socket, buckets: _Buckets, upstream: Connection
+    ) -> None:
+        super().__init__(listener.getsockname(), _Handler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = listener
+        self.buckets = buckets
+        self._upstream = upstream
+        self._upstream_lock = threading.Lock()
+
+    def handle(self, request: dict) -> dict:
+        if type(request) is not dict:
+            raise TypeError(f"요청은 JSON 객체여야 합니다: {request!r}")
+        op = request.get("op")
+        if op == "add":
+            rows = _positions(request["positions"])
+            self.buckets.add(rows)
+            return {"ok": True, "added": len(rows)}
+        if op == "total":
+            currency = _field(request, "currency", str)
+            account = request.get("account")
+            if account is not None:
+                account = _field(request, "account", str)
+            return self._ask(("total", currency, account))
+        if op == "rate":
+            return self._ask(
+                (
+                    "rate",
+                    _field(request, "from", str),
+                    _field(request, "to", str),
+                    _field(request, "rate", int),
+                )
+            )
+        raise ValueError(f"알 수 없는 요청입니다: {op}")
+
+    def _ask(self, request: tuple) -> dict:
+        with self._upstream_lock:
+            self._upstream.send(request)
+            return self._upstream.recv()
+
+
+def _positions(positions: list[dict]) -> list[Position]:
+    # 모두 검사한 뒤에 쌓는다 - 잘못된 포지션이 섞인 요청은 하나도 쌓지 않는다
+    if type(positions) is not list:
+        raise TypeError(f"positions는 목록이어야 합니다: {positions!r}")
+    rows = []
+    for position in positions:
+        if type(position) is not dict:
+            raise TypeError(f"포지션은 JSON 객체여야 합니다: {position!r}")
+        rows.append(
+            (
+                _field(position, "account", str),
+                _field(position, "amount", int),
+                _field(position, "currency", str),
+            )
+        )
+    return rows
+
+
+def _control(control: Connection, buckets: _Buckets, server: _SocketServer) -> None:
+    # 서버 프로세스의 질의에 답하는 스레드 - "stop"이면 accept 루프를 멈춘다
+    while True:
+        message = control.recv()
+        op = message[0]
+        if op == "currencies":
+            control.send(buckets.currencies(message[1]))
+        elif op == "convert":
+            control.send(buckets.convert(*message[1:]))
+        elif op == "buckets":
+            control.send(buckets.copy(message[1]))
+        else:  # "stop"
+            server.shutdown()
+            control.close()
+            return
+
+
+def _worker(listener: socket.socket, control: Connection, upstream: Connection) -> None:
+    """샤드 워커 - 물려받은 소켓에서 연결을 받아 파싱부터 버킷 쌓기까지 한다"""
+    buckets = _Buckets()
+    server = _SocketServer(listener, buckets, upstream)
+    threading.Thread(
+        target=_control, args=(control, buckets, server), daemon=True
+    ).start()
+    server.serve_forever()
+    server.server_close()
+    upstream.close()
+
+
+class _Shard:
+    """워커 프로세스 하나와 파이프 두 개
+
+    control은 서버가 묻고 워커가 답하며 요청/응답 한 쌍을 락 안에서 주고받는다.
+    upstream은 워커가 total/rate를 묻고 서버의 스레드 하나가 답한다.
+    """
+
+    def __init__(
+        self, context: multiprocessing.context.BaseContext, listener: socket.socket
+    ) -> None:
+        self.conn, control = context.Pipe()
+        self.upstream, child = context.Pipe()
+        self.process = context.Process(
+            target=_worker, args=(listener, control, child), daemon=True
+        )
+        self.process.start()
+        control.close()
+        child.close()
+        self.lock = threading.Lock()
+        self.thread: threading.Thread | None = None
+
+    def stop(self) -> None:
+        with self.lock:
+            self.conn.send(("stop",))
+            self.conn.close()
+        self.process.join()
+        if self.thread is not None:
+            self.thread.join()
+        self.upstream.close()
+
+
+class AggregationServer:
+    """workers개 프로세스가 소켓에서 직접 포지션을 받아 쌓고, 총액 질의에 답하는 서버
+
+    with 블록이나 start()/close()로 쓴다. start()는 워커를 띄우고 바로 돌아온다.
+    """
+
+    def __init__(
+        self, path: str | Path, bank: Bank | None = None, workers: int | None = None
+    ) -> None:
+        self.path = Path(path)
+        self.bank = bank if bank is not None else Bank()
+        self.workers = workers or os.cpu_count() or 1
+        self._shards: list[_Shard] = []
+
+    def __enter__(self) -> AggregationServer:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def start(self) -> None:
+        self.path.unlink(missing_ok=True)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            listener.bind(str(self.path))
+            listener.listen(socketserver.UnixStreamServer.request_queue_size)
+            # 워커를 먼저 모두 띄운다 - 응답 스레드가 생긴 뒤에 fork하지 않도록
+            context = multiprocessing.get_context()
+            self._shards = [_Shard(context, listener) for _ in range(self.workers)]
+        finally:
+            listener.close()
+        for shard in self._shards:
+            shard.thread = threading.Thread(
+                target=self._answer, args=(shard.upstream,), daemon=True
+            )
+            shard.thread.start()
+
+    def close(self) -> None:
+        for shard in self._shards:
+            shard.stop()
+        self._shards = []
+        self.path.unlink(missing_ok=True)
+
+    def _answer(self, upstream: Connection) -> None:
+        # 워커 하나가 넘긴 total/rate 요청에 답한다 - 워커가 끝나면 EOFError로 멈춘다
+        while True:
+            try:
+                request = upstream.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                if request[0] == "total":
+                    version, amount = self.total(request[1], request[2])
+                    reply = {
+                        "ok": True,
+                        "amount": amount,
+                        "currency": request[1],
+                        "version": version,
+                    }
+                else:
+                    self.bank.add_rate(*request[1:])
+                    reply = {"ok": True, "version": self.bank.version}
+            except (KeyError, ValueError, TypeError) as error:
+                reply = _failure(error)
+            upstream.send(reply)
+
+    def _gather(self, *message: object) -> list:
+        # 샤드 번호 순으로 락을 잡아 보내고 나서 응답을 모은다 - 샤드들이 동시에 일한다
+        locked = []
+        try:
+            for shard in self._shards:
+                shard.lock.acquire()
+                locked.append(shard)
+                shard.conn.send(message)
+            return [shard.conn.recv() for shard in self._shards]
+        finally:
+            for shard in locked:
+                shard.lock.release()
+
+    def buckets(self, account: str | None = None) -> Buckets:
+        """샤드들의 버킷을 합친 것 - 확인용이며 total은 버킷을 옮기지 않는다"""
+        merged: Buckets = {}
+        for part in self._gather("buckets", account):
+            for currency, bucket in part.items():
+                merged.setdefault(currency, Counter()).update(bucket)
+        return merged
+
+    def total(self, currency: str, account: str | None = None) -> tuple[int, int]:
+        """(환율 버전, currency로 환산한 총액)
+
+        샤드에는 통화 목록과 환율표만 오가고, 금액별 버킷은 워커 밖으로 나오지 않는다.
+        """
+        currencies = set().union(*self._gather("currencies", account))
+        bank = self.bank.at()
+        rates = {source: bank.rate(source, currency) for source in currencies}
+        parts = self._gather("convert", account, rates, bank.rounding)
+        return bank.version, sum(sum(part.values()) for part in parts)
@@ -0,0 +1,131 @@
+import pytest
+
+from part01.ch16.currency import Bank, Money
+from part01.ch16.service import AggregationServer, Client
+from part01.ch16.service.__main__ import main
+from part01.ch16.service.loadgen import generate_positions, rate_bank, run_load
+
+
+def reduce_positions(bank, positions, to_currency, account=None):
+    """같은 포지션으로 만든 Sum을 축소한 기준값"""
+    expr = Money.dollar(0)
+    for owner, amount, currency in positions:
+        if account is None or owner == account:
+            expr = expr.plus(Money(amount, currency))
+    return bank.reduce(expr, to_currency)
+
+
+class TestAggregationServer:
+    """샤딩 집계 서버"""
+
+    @pytest.fixture
+    def server(self, tmp_path):
+        with AggregationServer(tmp_path / "agg.sock", rate_bank(), workers=3) as server:
+            yield server
+
+    def test_total_matches_reduce(self, server):
+        positions = generate_positions(2000, accounts=50)
+        with Client(server.path) as client:
+            assert 1500 == client.add(positions[:1500])
+            assert 500 == client.add(positions[1500:])
+            assert reduce_positions(server.bank, positions, "USD") == client.total(
+                "USD"
+            )
+
+    def test_account_total(self, server):
+        positions = generate_positions(500, accounts=10)
+        with Client(server.path) as client:
+            client.add(positions)
+            expected = reduce_positions(server.bank, positions, "USD", "acct-3")
+            assert expected == client.total("USD", account="acct-3")
+            assert Money.dollar(0) == client.total("USD", account="nobody")
+
+    def test_rate_update(self, server):
+        with Client(server.path) as client:
+            client.add([("a", 10, "CHF"), ("b", 11, "CHF")])
+            assert Money.dollar(10) == client.total("USD")
+            version = client.add_rate("CHF", "USD", 1)
+            assert server.bank.version == version
+            assert Money.dollar(21) == client.total("USD")
+
+    def test_errors(self, server):
+        with Client(server.path) as client:
+            client.add([("a", 10, "KRW")])
+            with pytest.raises(KeyError):
+                client.total("USD")
+            with pytest.raises(ValueError):
+                client._call({"op": "nope"})
+            assert Money(10, "KRW") == client.total("KRW")
+
+    @pytest.mark.parametrize(
+        "request_",
+        [
+            [1],
+            "add",
+            {"op": "add", "positions": {"account": "a"}},
+            {"op": "add", "positions": [1]},
+            {
+                "op": "add",
+                "positions": [{"account": 1, "amount": 5, "currency": "USD"}],
+            },
+            {
+                "op": "add",
+                "positions": [{"account": "a", "amount": 12.9, "currency": "USD"}],
+            },
+            {
+                "op": "add",
+                "positions": [{"account": "a", "amount": True, "currency": "USD"}],
+            },
+            {
+                "op": "add",
+                "positions": [{"account": "a", "amount": 5, "currency": None}],
+            },
+            {"op": "total", "currency": 1},
+            {"op": "total", "currency": "USD", "account": ["a"]},
+            {"op": "rate", "from": "CHF", "to": "USD", "rate": 2.5},
+        ],
+    )
+    def test_malformed_requests(self, server, request_):
+        """잘못된 요청에도 오류 응답을 보내고 연결을 유지한다"""
+        with Client(server.path) as client:
+            client.add([("a", 10, "CHF")])
+            with pytest.raises(TypeError):
+                client._call(request_)
+            assert Money.dollar(5) == client.total("USD")
+
+    def test_account_across_connections(self, server):
+        """한 계좌의 포지션이 여러 워커에 나뉘어 쌓여도 계좌 총액은 모두 더한다"""
+        positions = generate_positions(600, accounts=5)
+        clients = [Client(server.path) for _ in range(6)]
+        try:
+            for index, client in enumerate(clients):
+                client.add(positions[index * 100 : (index + 1) * 100])
+            expected = reduce_positions(server.bank, positions, "USD", "acct-2")
+            assert expected == clients[0].total("USD", account="acct-2")
+        finally:
+            for client in clients:
+                client.close()
+
+    def test_rejects_bad_rate(self, server):
+        with Client(server.path) as client:
+            with pytest.raises(ValueError):
+                client.add_rate("CHF", "USD", 0)
+            version = client.add_rate("CHF", "USD", 1)
+            assert server.bank.version == version
+
+
+class TestLoadgen:
+    """부하 생성기"""
+
+    def test_run_load(self, tmp_path):
+        path = tmp_path / "agg.sock"
+        with AggregationServer(path, Bank(), workers=2) as server:
+            assert run_load(path, 1000, clients=2, batch=100) > 0
+            buckets = server.buckets()
+            assert 1000 == sum(sum(bucket.values()) for bucket in buckets.values())
+
+    def test_bench_command(self, capsys):
+        assert 0 == main(
+            ["bench", "--workers", "2", "--positions", "400", "--clients", "2"]
+        )
+        assert 2 == len(capsys.readouterr().out.splitlines())
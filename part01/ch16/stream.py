@@ -0,0 +1,164 @@
+"""스트리밍 축소 - 큰 CSV/JSONL 파일의 Money 레코드를 일정한 메모리로 합산한다
+
+파일을 mmap으로 열어 block_size 단위로 잘라 파싱하고, 블록마다 MoneyBatch 하나를
+만들어 누적 합계에 더한다. Sum 트리나 전체 레코드 목록은 만들지 않는다.
+
+CSV는 "amount,currency" 줄(첫 줄 헤더는 건너뜀), JSONL은
+{"amount": 5, "currency": "USD"} 줄이다. 금액은 최소 단위 정수다.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+from collections.abc import Iterator
+from pathlib import Path
+
+from part01.ch16.batch import MoneyBatch
+from part01.ch16.currency import Bank, Money
+
+BLOCK_SIZE = 1 << 20
+
+
+def read_batches(
+    path: str | Path, block_size: int = BLOCK_SIZE, file_format: str | None = None
+) -> Iterator[MoneyBatch]:
+    """파일을 block_size 바이트 안팎의 블록으로 읽어 블록마다 MoneyBatch를 낸다
+
+    file_format은 "csv" 또는 "jsonl"이며, 없으면 확장자로 고른다.
+    """
+    path = Path(path)
+    if file_format is None:
+        file_format = "jsonl" if path.suffix in (".jsonl", ".ndjson") else "csv"
+    if file_format not in ("csv", "jsonl"):
+        raise ValueError(f"알 수 없는 형식입니다: {file_format}")
+    parse = _parse_jsonl if file_format == "jsonl" else _parse_csv
+    codes: dict[bytes, str] = {}
+    with open(path, "rb") as file:
+        if path.stat().st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            size = len(view)
+            start = 0
+            while start < size:
+                end = _block_end(view, start, block_size)
+                amounts: list[int] = []
+                currencies: list[str] = []
+                parse(view[start:end], amounts, currencies, codes, start == 0)
+                start = end
+                if amounts:
+                    yield MoneyBatch(amounts, currencies)
+
+
+def _block_end(view: mmap.mmap, start: int, block_size: int) -> int:
+    """start부터 block_size 안에서 마지막 줄바꿈 바로 뒤 - 줄을 자르지 않는다"""
+    size = len(view)
+    if start + block_size >= size:
+        return size
+    newline = view.rfind(b"\n", start, start + block_size)
+    if newline < 0:
+        # 블록보다 긴 줄 - 그 줄이 끝나는 곳까지 늘린다
+        newline = view.find(b"\n", start + block_size)
+        if newline < 0:
+            return size
+    return newline + 1
+
+
+def _currency(raw: bytes, codes: dict[bytes, str]) -> str:
+    currency = codes.get(raw)
+    if currency is None:
+        currency = codes[raw] = raw.decode()
+    return currency
+
+
+def _parse_csv(
+    block: bytes,
+    amounts: list[int],
+    currencies: list[str],
+    codes: dict[bytes, str],
+    first: bool,
+) -> None:
+    lines = block.split(b"\n")
+    if first and lines:
+        try:
+            int(lines[0].partition(b",")[0])
+        except ValueError:
+            lines = lines[1:]  # 헤더
+    for line in lines:
+        if not line.strip():
+            continue
+        amount, _, currency = line.partition(b",")
+        currency = currency.strip()
+        # 빈 줄만 건너뛴다 - 쉼표나 통화가 없는 줄을 조용히 버리면 합계가 틀린다
+        if not currency:
+            raise ValueError(f"'금액,통화' 형식이 아닌 줄입니다: {line!r}")
+        amounts.append(int(amount))
+        currencies.append(_currency(currency, codes))
+
+
+def _parse_jsonl(
+    block: bytes,
+    amounts: list[int],
+    currencies: list[str],
+    codes: dict[bytes, str],
+    first: bool,
+) -> None:
+    for line in block.split(b"\n"):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        amount = record["amount"]
+        # 최소 단위 정수만 받는다 - 12.99 같은 값을 int()로 잘라 버리지 않도록
+        if type(amount) is not int:
+            raise ValueError(f"금액은 최소 단위 정수여야 합니다: {amount!r}")
+        currency = record["currency"]
+        if type(currency) is not str:
+            raise ValueError(f"통화는 문자열이어야 합니다: {currency!r}")
+        amounts.append(amount)
+        currencies.append(currency)
+
+
+class RunningTotals:
+    """통화별 누적 합계와 환산 누적 합계 - 메모리는 통화 수에만 비례한다
+
+    bank를 주면 만들 때의 환율 버전에 고정해 to_currency로 환산한 합계도 함께 쌓는다.
+    환산은 레코드마다 반올림하므로 같은 레코드로 만든 Sum을 reduce한 결과와 같다.
+    """
+
+    def __init__(
+        self, bank: Bank | None = None, to_currency: str | None = None
+    ) -> None:
+        self._bank = bank.at() if bank is not None else None
+        self._to_currency = to_currency
+        self._totals: dict[str, int] = {}
+        self._converted = 0
+        self.count = 0
+
+    def add(self, batch: MoneyBatch) -> None:
+        for currency, amount in batch.totals().items():
+            self._totals[currency] = self._totals.get(currency, 0) + amount
+        if self._bank is not None:
+            self._converted += batch._reduce_amount(self._bank, self._to_currency)
+        self.count += len(batch)
+
+    def totals(self) -> dict[str, int]:
+        return dict(self._totals)
+
+    def value(self) -> Money:
+        if self._bank is None:
+            raise ValueError("환산할 Bank가 없습니다")
+        return Money.of(self._converted, self._to_currency)
+
+
+def reduce_file(
+    path: str | Path,
+    bank: Bank,
+    to_currency: str,
+    block_size: int = BLOCK_SIZE,
+    file_format: str | None = None,
+) -> Money:
+    """파일의 모든 레코드를 to_currency로 환산한 합계"""
+    totals = RunningTotals(bank, to_currency)
+    for batch in read_batches(path, block_size, file_format):
+        totals.add(batch)
+    return totals.value()
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from part01.ch16.async_bank import AsyncBank, RateProvider
+from part01.ch16.currency import ROUND_HALF_UP, Money
+
+
+class FakeRateServer(RateProvider):
+    """호출 횟수를 세는 가짜 시세 서버"""
+
+    def __init__(self, rates):
+        self.rates = rates
+        self.calls = []
+
+    async def fetch(self, from_currency, to_currency):
+        self.calls.append((from_currency, to_currency))
+        await asyncio.sleep(0.01)
+        return self.rates[(from_currency, to_currency)]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAsyncBank:
+    """비동기 환율 공급자를 쓰는 AsyncBank"""
+
+    def setup_method(self):
+        self.server = FakeRateServer({("CHF", "USD"): 2, ("EUR", "USD"): 3})
+        self.clock = FakeClock()
+        self.bank = AsyncBank(self.server, ttl=10.0, clock=self.clock)
+
+    def test_reduce(self):
+        expr = Money.dollar(5).plus(Money.franc(10)).plus(Money(9, "EUR"))
+        result = asyncio.run(self.bank.reduce(expr, "USD"))
+        assert Money.dollar(13) == result
+
+    def test_concurrent_requests_share_one_fetch(self):
+        async def main():
+            expr = Money.franc(10)
+            return await asyncio.gather(
+                *(self.bank.reduce(expr, "USD") for _ in range(1_000))
+            )
+
+        results = asyncio.run(main())
+        assert [("CHF", "USD")] == self.server.calls
+        assert {Money.dollar(5)} == set(results)
+
+    def test_cache_expires_after_ttl(self):
+        async def main():
+            await self.bank.rate("CHF", "USD")
+            self.clock.now = 5.0
+            await self.bank.rate("CHF", "USD")
+            self.clock.now = 11.0
+            await self.bank.rate("CHF", "USD")
+
+        asyncio.run(main())
+        assert 2 == len(self.server.calls)
+
+    def test_add_rate(self):
+        self.bank.add_rate("KRW", "USD", 1000)
+        assert 1000 == asyncio.run(self.bank.rate("KRW", "USD"))
+        assert [] == self.server.calls
+
+    @pytest.mark.parametrize("rate", [0, -2])
+    def test_add_rate_rejects_non_positive(self, rate):
+        with pytest.raises(ValueError):
+            self.bank.add_rate("KRW", "USD", rate)
+        assert {} == self.bank._cache
+
+    def test_fetched_bad_rate_not_cached(self):
+        self.server.rates[("KRW", "USD")] = 0
+
+        async def main():
+            for _ in range(2):
+                with pytest.raises(ValueError):
+                    await self.bank.reduce(Money(5, "KRW"), "USD")
+
+        asyncio.run(main())
+        assert 2 == len(self.server.calls)
+
+    def test_missing_rate_not_cached(self):
+        async def main():
+            for _ in range(2):
+                with pytest.raises(KeyError):
+                    await self.bank.rate("KRW", "USD")
+
+        asyncio.run(main())
+        assert 2 == len(self.server.calls)
+
+    def test_rounding(self):
+        bank = AsyncBank(self.server, rounding=ROUND_HALF_UP)
+        assert Money.dollar(3) == asyncio.run(bank.reduce(Money.franc(5), "USD"))
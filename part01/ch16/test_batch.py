@@ -0,0 +1,112 @@
+import pytest
+
+from part01.ch16.batch import MoneyBatch
+from part01.ch16.currency import ROUND_HALF_UP, Bank, Money, Sum
+
+
+class TestMoneyBatch:
+    """MoneyBatch - 열 지향 Money 묶음"""
+
+    def test_rows(self):
+        batch = MoneyBatch([5, 10], ["USD", "CHF"])
+        assert 2 == len(batch)
+        assert Money.dollar(5) == batch[0]
+        assert [Money.dollar(5), Money.franc(10)] == list(batch)
+        assert ["USD", "CHF"] == batch.currencies()
+
+    def test_length_mismatch(self):
+        with pytest.raises(ValueError):
+            MoneyBatch([5, 10], ["USD"])
+
+    def test_times(self):
+        batch = MoneyBatch.of([1, 2, 3], "USD").times(2)
+        assert [Money.dollar(2), Money.dollar(4), Money.dollar(6)] == list(batch)
+
+    def test_reduce_mixed(self):
+        """$5 + 10 CHF + 3 CHF = $11 (환율 2:1, Money마다 내림)"""
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        batch = MoneyBatch([5, 10, 3], ["USD", "CHF", "CHF"])
+        assert Money.dollar(11) == bank.reduce(batch, "USD")
+
+    def test_reduce_matches_sum(self):
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 3)
+        moneys = [Money(amount, ("USD", "CHF")[amount % 2]) for amount in range(100)]
+        expr = moneys[0]
+        for money in moneys[1:]:
+            expr = expr.plus(money)
+        batch = MoneyBatch.from_money(moneys)
+        assert bank.reduce(expr, "USD") == bank.reduce(batch, "USD")
+
+    def test_plus_batch_concatenates(self):
+        left = MoneyBatch.of([5], "USD")
+        right = MoneyBatch([10, 1], ["CHF", "USD"])
+        result = left.plus(right)
+        assert isinstance(result, MoneyBatch)
+        assert [Money.dollar(5), Money.franc(10), Money.dollar(1)] == list(result)
+
+    def test_plus_money_and_reduce_sum(self):
+        """배치가 Sum 트리 안에 들어가도 축소된다"""
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        expr = MoneyBatch.of([10, 20], "CHF").plus(Money.dollar(5))
+        assert isinstance(expr, Sum)
+        assert Money.dollar(20) == bank.reduce(expr, "USD")
+        assert Money.dollar(40) == bank.reduce(expr.times(2), "USD")
+
+    def test_reduce_with_rounding(self):
+        bank = Bank(rounding=ROUND_HALF_UP)
+        bank.add_rate("CHF", "USD", 2)
+        batch = MoneyBatch([5, 5, 1], ["CHF", "CHF", "USD"])
+        assert Money.dollar(7) == bank.reduce(batch, "USD")
+
+
+class TestMoneyBatchOverflow:
+    """int64를 넘는 행 - 그 행만 정확한 정수로 따로 담는다"""
+
+    BIG = 2**63
+
+    def test_big_rows(self):
+        batch = MoneyBatch([5, self.BIG, -self.BIG - 1], ["USD", "USD", "CHF"])
+        assert {1: self.BIG, 2: -self.BIG - 1} == batch._bigs
+        assert Money.dollar(self.BIG) == batch[1]
+        assert Money.franc(-self.BIG - 1) == batch[-1]
+        assert [5, self.BIG, -self.BIG - 1] == [money._amount for money in batch]
+        assert {"USD": self.BIG + 5, "CHF": -self.BIG - 1} == batch.totals()
+
+    def test_times_fast_path(self):
+        batch = MoneyBatch.of([2**31, -(2**31)], "USD").times(2**31)
+        assert {} == batch._bigs
+        assert [2**62, -(2**62)] == [money._amount for money in batch]
+
+    def test_times_promotes_only_overflowing_rows(self):
+        batch = MoneyBatch.of([1, 2**40, 3], "USD").times(2**30)
+        assert {1: 2**70} == batch._bigs
+        assert [2**30, 2**70, 3 * 2**30] == [money._amount for money in batch]
+
+    def test_times_demotes_rows_back(self):
+        batch = MoneyBatch.of([self.BIG, 1], "USD").times(0)
+        assert {} == batch._bigs
+        assert [0, 0] == [money._amount for money in batch]
+
+    def test_reduce_with_big_rows(self):
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 3)
+        amounts = [7, 2**64 + 1, 11, -(2**65)]
+        currencies = ["CHF", "CHF", "USD", "CHF"]
+        batch = MoneyBatch(amounts, currencies)
+        expr = Money(amounts[0], currencies[0])
+        for amount, currency in zip(amounts[1:], currencies[1:], strict=True):
+            expr = expr.plus(Money(amount, currency))
+        assert bank.reduce(expr, "USD") == bank.reduce(batch, "USD")
+        assert bank.reduce(expr, "USD") == bank.reduce(
+            Sum(batch, Money.dollar(0)), "USD"
+        )
+
+    def test_plus_shifts_big_rows(self):
+        batch = MoneyBatch.of([1, self.BIG], "USD").plus(
+            MoneyBatch.of([self.BIG], "CHF")
+        )
+        assert {1: self.BIG, 2: self.BIG} == batch._bigs
+        assert Money.franc(self.BIG) == batch[2]
@@ -0,0 +1,119 @@
+from part01.ch16.cache import ReduceCache
+from part01.ch16.currency import Bank, Money, Sum
+
+
+class CountingSum(Sum):
+    """reduce 호출 수를 세는 Sum"""
+
+    __slots__ = ("calls",)
+
+    def __init__(self, augend, addend):
+        super().__init__(augend, addend)
+        self.calls = 0
+
+    def reduce(self, bank, to_currency):
+        self.calls += 1
+        return super().reduce(bank, to_currency)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestReduceCache:
+    """Bank 축소 결과 캐시"""
+
+    def setup_method(self):
+        self.bank = Bank()
+        self.bank.add_rate("CHF", "USD", 2)
+        self.expr = CountingSum(Money.dollar(5), Money.franc(10))
+
+    def test_disabled_by_default(self):
+        self.bank.reduce(self.expr, "USD")
+        self.bank.reduce(self.expr, "USD")
+        assert 2 == self.expr.calls
+        assert {} == self.bank.cache_stats()
+
+    def test_hit(self):
+        self.bank.enable_cache()
+        assert Money.dollar(10) == self.bank.reduce(self.expr, "USD")
+        assert Money.dollar(10) == self.bank.reduce(self.expr, "USD")
+        assert 1 == self.expr.calls
+        stats = self.bank.cache_stats()
+        assert 1 == stats["hits"]
+        assert 1 == stats["misses"]
+        assert 0.5 == stats["hit_rate"]
+
+    def test_keyed_by_identity_and_currency(self):
+        """값이 같아도 다른 객체, 다른 도착 통화는 따로 축소한다"""
+        self.bank.add_rate("USD", "CHF", 1)
+        self.bank.enable_cache()
+        other = CountingSum(Money.dollar(5), Money.franc(10))
+        for _ in range(2):
+            self.bank.reduce(self.expr, "USD")
+            self.bank.reduce(self.expr, "CHF")
+            self.bank.reduce(other, "USD")
+        assert 2 == self.expr.calls
+        assert 1 == other.calls
+
+    def test_add_rate_invalidates(self):
+        self.bank.enable_cache()
+        self.bank.reduce(self.expr, "USD")
+        self.bank.add_rate("CHF", "USD", 5)
+        assert Money.dollar(7) == self.bank.reduce(self.expr, "USD")
+        assert 2 == self.expr.calls
+
+    def test_pinned_version_still_hits(self):
+        self.bank.enable_cache()
+        version = self.bank.version
+        self.bank.reduce(self.expr, "USD")
+        self.bank.add_rate("CHF", "USD", 5)
+        assert Money.dollar(10) == self.bank.reduce(self.expr, "USD", version=version)
+        assert 1 == self.expr.calls
+
+    def test_with_stats(self):
+        self.bank.enable_stats()
+        self.bank.enable_cache()
+        self.bank.reduce(self.expr, "USD")
+        self.bank.reduce(self.expr, "USD")
+        assert 1 == self.bank.stats()["reduce_calls"]
+
+    def test_hooks_share_one_switch(self, monkeypatch):
+        """둘 중 하나라도 켜져 있으면 훅 경로, 모두 끄면 reduce는 속성 하나만 본다"""
+        self.bank.enable_stats()
+        self.bank.enable_cache()
+        self.bank.disable_cache()
+        self.bank.reduce(self.expr, "USD")
+        assert 1 == self.bank.stats()["reduce_calls"]
+        self.bank.disable_stats()
+
+        def fail(*args):
+            raise AssertionError("꺼진 훅 경로를 탔습니다")
+
+        monkeypatch.setattr(self.bank, "_reduce_hooked", fail)
+        assert Money.dollar(10) == self.bank.reduce(self.expr, "USD")
+
+    def test_lru_eviction(self):
+        cache = ReduceCache(maxsize=2)
+        a, b, c = Money.dollar(1), Money.dollar(2), Money.dollar(3)
+        for source in (a, b, c):
+            cache.put(source, 1, "USD", source)
+        assert cache.get(a, 1, "USD") is None
+        assert c is cache.get(c, 1, "USD")
+        assert 2 == len(cache)
+        assert 1 == cache.snapshot()["evictions"]
+
+    def test_ttl(self):
+        clock = FakeClock()
+        cache = ReduceCache(ttl=10.0, clock=clock)
+        five = Money.dollar(5)
+        cache.put(five, 1, "USD", five)
+        clock.now = 9.0
+        assert five is cache.get(five, 1, "USD")
+        clock.now = 10.0
+        assert cache.get(five, 1, "USD") is None
+        assert 0 == len(cache)
@@ -0,0 +1,121 @@
+from part01.ch16.batch import MoneyBatch
+from part01.ch16.compiler import Plan, compile, simplify
+from part01.ch16.currency import ROUND_HALF_UP, Bank, Money, Sum
+
+
+def portfolio():
+    """($5 + 10 CHF) * 2 + 3 CHF"""
+    return Sum(Money.dollar(5), Money.franc(10)).times(2).plus(Money.franc(3))
+
+
+class TestCompile:
+    """Expression 컴파일러 - 평가 계획"""
+
+    def test_compile_returns_plan(self):
+        plan = compile(portfolio())
+        assert isinstance(plan, Plan)
+        assert ["USD", "CHF"] == plan.currencies()
+
+    def test_plan_reduce_matches_tree(self):
+        expr = portfolio()
+        plan = compile(expr)
+        bank = Bank()
+        for rate in (1, 2, 3, 7):
+            bank.add_rate("CHF", "USD", rate)
+            assert bank.reduce(expr, "USD") == bank.reduce(plan, "USD")
+
+    def test_plan_reduce_truncates_per_money(self):
+        """3 CHF + 3 CHF는 환율 2:1에서 여전히 $2"""
+        plan = compile(Money.franc(3).plus(Money.franc(3)))
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        assert Money.dollar(2) == bank.reduce(plan, "USD")
+
+    def test_plan_times_folds_multiplier(self):
+        plan = compile(portfolio()).times(3)
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        assert bank.reduce(portfolio().times(3), "USD") == bank.reduce(plan, "USD")
+
+    def test_plan_in_sum(self):
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        expr = compile(portfolio()).plus(MoneyBatch.of([4], "CHF"))
+        assert Money.dollar(23) == bank.reduce(expr, "USD")
+
+    def test_plan_reduce_with_rounding(self):
+        expr = Money.franc(5).plus(Money.franc(5)).plus(Money.franc(4))
+        bank = Bank(rounding=ROUND_HALF_UP)
+        bank.add_rate("CHF", "USD", 2)
+        assert bank.reduce(expr, "USD") == bank.reduce(compile(expr), "USD")
+        assert Money.dollar(8) == bank.reduce(compile(expr), "USD")
+
+
+class TestSimplify:
+    """정규형 단순화"""
+
+    def test_single_leaf_becomes_money(self):
+        assert Money.franc(30) == simplify(Money.franc(10).times(3))
+        assert Money.franc(10) == simplify(compile(Money.franc(10)))
+
+    def test_same_shape_is_equal(self):
+        left = simplify(portfolio())
+        right = simplify(Money.franc(3).plus(Money.franc(20)).plus(Money.dollar(10)))
+        assert left == right
+        assert hash(left) == hash(right)
+
+    def test_different_amounts_are_not_folded(self):
+        plan = simplify(Money.franc(3).plus(Money.franc(1)))
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        assert Money.dollar(1) == bank.reduce(plan, "USD")
+
+    def test_plus_stays_flat(self):
+        expr = simplify(portfolio())
+        for _ in range(1000):
+            expr = expr.plus(Money.franc(3))
+        assert isinstance(expr, Plan)
+        assert {"USD": ((1, 1),), "CHF": ((3, 1001), (20, 1))} == expr._terms
+        assert {"USD": 10, "CHF": 1} == expr._factors
+
+    def test_hoists_common_multiplier(self):
+        """6 CHF + 9 CHF는 3 * (2 CHF + 3 CHF)로 담긴다"""
+        plan = simplify(Money.franc(6).plus(Money.franc(9)))
+        assert {"CHF": 3} == plan._factors
+        assert {"CHF": ((2, 1), (3, 1))} == plan._terms
+        assert plan == simplify(Money.franc(2).plus(Money.franc(3))).times(3)
+        assert hash(plan) == hash(
+            simplify(Money.franc(3).plus(Money.franc(2)).times(3))
+        )
+
+    def test_times_shares_terms(self):
+        plan = simplify(portfolio())
+        scaled = plan.times(1000)
+        assert scaled._terms is plan._terms
+        assert {"USD": 10_000, "CHF": 1000} == scaled._factors
+
+    def test_times_any_sign_matches_tree(self):
+        expr = portfolio().plus(Money.franc(-7))
+        bank = Bank(rounding=ROUND_HALF_UP)
+        for rate in (1, 2, 3, 4):
+            bank.add_rate("CHF", "USD", rate)
+            for multiplier in (-3, 0, 1, 4):
+                tree = bank.reduce(expr.times(multiplier), "USD")
+                assert tree == bank.reduce(simplify(expr).times(multiplier), "USD")
+        assert simplify(expr.times(0)) == simplify(expr).times(0)
+        assert simplify(expr.times(-2)) == simplify(expr).times(-2)
+
+    def test_times_keeps_zero_currency_equal(self):
+        expr = Money.franc(0).plus(Money.franc(0)).plus(Money.dollar(4))
+        for multiplier in (3, -3, 0):
+            assert simplify(expr.times(multiplier)) == simplify(expr).times(multiplier)
+            assert hash(simplify(expr.times(multiplier))) == hash(
+                simplify(expr).times(multiplier)
+            )
+
+    def test_reduce_matches_tree(self):
+        expr = portfolio().times(2).plus(portfolio())
+        bank = Bank()
+        for rate in (1, 2, 3, 7):
+            bank.add_rate("CHF", "USD", rate)
+            assert bank.reduce(expr, "USD") == bank.reduce(simplify(expr), "USD")
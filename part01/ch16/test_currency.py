@@ -1,4 +1,31 @@
-from part01.ch16.currency import Bank, Money, Sum
+import pickle
+import threading
+from math import isqrt
+
+import pytest
+
+from part01.ch16.batch import MoneyBatch
+from part01.ch16.compiler import compile
+from part01.ch16.currency import (
+    MIN_CHANGES,
+    ROUND_CEILING,
+    ROUND_DOWN,
+    ROUND_FLOOR,
+    ROUND_HALF_EVEN,
+    ROUND_HALF_UP,
+    ROUND_UP,
+    ROUNDING_MODES,
+    Bank,
+    Money,
+    Pair,
+    Sum,
+    collect_buckets,
+    convert_buckets,
+    disable_interning,
+    divide,
+    enable_interning,
+)
+from part01.ch16.dag import Dag
 
 
 class TestMoney:
@@ -94,3 +121,378 @@ class TestMoney:
         sum_expr = Sum(five_bucks, ten_francs).times(2)
         result = bank.reduce(sum_expr, "USD")
         assert Money.dollar(20) == result
+
+    # 반복적 축소 엔진 - 깊은 Sum 트리
+
+    def test_reduce_deep_sum(self):
+        """재귀 한도를 넘는 깊이의 Sum 트리도 축소된다"""
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        expr = Money.dollar(1)
+        for _ in range(100_000):
+            expr = expr.plus(Money.franc(2))
+        result = bank.reduce(expr, "USD")
+        assert Money.dollar(100_001) == result
+
+    def test_reduce_truncates_per_money(self):
+        """환율 적용 후 내림은 Money마다 일어난다: 3 CHF + 3 CHF = $2"""
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        result = bank.reduce(Money.franc(3).plus(Money.franc(3)), "USD")
+        assert Money.dollar(2) == result
+
+    def test_collect_buckets(self):
+        expr = Money.dollar(5).plus(Money.franc(10)).plus(Money.dollar(5))
+        buckets = collect_buckets(expr)
+        assert {"USD": {5: 2}, "CHF": {10: 1}} == buckets
+
+    # 환율 색인 - 경로 탐색과 메모
+
+    def test_cross_rate(self):
+        """CHF→USD, USD→EUR만 있으면 CHF→EUR은 두 환율의 곱"""
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        bank.add_rate("USD", "EUR", 3)
+        assert 6 == bank.rate("CHF", "EUR")
+        assert Money(1, "EUR") == bank.reduce(Money.franc(6), "EUR")
+
+    def test_direct_rate_preferred(self):
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        bank.add_rate("USD", "EUR", 3)
+        bank.add_rate("CHF", "EUR", 5)
+        assert 5 == bank.rate("CHF", "EUR")
+
+    def test_rate_index_invalidated(self):
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        assert 2 == bank.rate("CHF", "USD")
+        bank.add_rate("CHF", "USD", 4)
+        assert 4 == bank.rate("CHF", "USD")
+
+    def test_missing_rate(self):
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        with pytest.raises(KeyError):
+            bank.rate("USD", "CHF")
+
+    def test_compact_instances(self):
+        """__slots__ - 인스턴스마다 __dict__를 두지 않는다"""
+        five = Money.dollar(5)
+        assert not hasattr(five, "__dict__")
+        assert not hasattr(five.plus(five), "__dict__")
+        assert not hasattr(Pair("CHF", "USD"), "__dict__")
+
+
+class TestBankVersions:
+    """버전이 매겨진 환율 스냅샷"""
+
+    def test_add_rate_publishes_new_version(self):
+        bank = Bank()
+        assert 0 == bank.version
+        bank.add_rate("CHF", "USD", 2)
+        assert 1 == bank.version
+        bank.add_rate("CHF", "USD", 4)
+        assert 2 == bank.version
+        assert 2 == bank.snapshot(1).rate("CHF", "USD")
+        assert 4 == bank.snapshot().rate("CHF", "USD")
+
+    def test_reduce_at_version(self):
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        bank.add_rate("CHF", "USD", 5)
+        expr = Money.dollar(5).plus(Money.franc(10))
+        assert Money.dollar(10) == bank.reduce(expr, "USD", version=1)
+        assert Money.dollar(7) == bank.reduce(expr, "USD")
+
+    def test_pinned_bank_ignores_later_rates(self):
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        pinned = bank.at()
+        bank.add_rate("CHF", "USD", 5)
+        assert Money.dollar(5) == pinned.reduce(Money.franc(10), "USD")
+
+    def test_pinned_bank_is_read_only(self):
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        pinned = bank.at()
+        assert pinned is bank.at()
+        assert pinned is pinned.at(1)
+        with pytest.raises(TypeError):
+            pinned.add_rate("CHF", "USD", 5)
+        with pytest.raises(KeyError):
+            pinned.at(0)
+
+    def test_versions_share_graph(self):
+        """버전마다 변경분만 따로 들고 오래된 버전도 제 환율을 돌려준다"""
+        bank = Bank()
+        for i in range(500):
+            bank.add_rate(f"C{i}", "USD", i + 1)
+        bank.add_rate("C0", "EUR", 7)
+        latest = bank.snapshot()
+        assert len(latest._changes) <= max(MIN_CHANGES, isqrt(len(latest._graph)))
+        assert latest._graph is bank.snapshot(latest.version - 1)._graph
+        for version in (1, 250, 500):
+            snapshot = bank.snapshot(version)
+            assert version == snapshot.rate(f"C{version - 1}", "USD")
+            with pytest.raises(KeyError):
+                snapshot.rate(f"C{version}", "USD")
+        assert 7 == latest.rate("C0", "EUR")
+        assert 501 == len(latest.rates())
+
+    def test_history_is_bounded(self):
+        bank = Bank(history=2)
+        for rate in range(1, 5):
+            bank.add_rate("CHF", "USD", rate)
+        assert 3 == bank.snapshot(3).rate("CHF", "USD")
+        with pytest.raises(KeyError):
+            bank.snapshot(1)
+
+    def test_subscribe(self):
+        bank = Bank()
+        changes = []
+
+        def listener(snapshot, from_currency, to_currency):
+            changes.append((snapshot.version, from_currency, to_currency))
+
+        bank.subscribe(listener)
+        bank.add_rate("CHF", "USD", 2)
+        bank.unsubscribe(listener)
+        bank.add_rate("EUR", "USD", 3)
+        assert [(1, "CHF", "USD")] == changes
+
+    def test_concurrent_readers_see_consistent_rates(self):
+        """환율이 바뀌는 동안에도 고정한 버전의 결과는 그 버전의 환율과 맞는다"""
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 1)
+        expr = Money.franc(1_000).plus(Money.dollar(1))
+        mismatches = []
+
+        def read():
+            for _ in range(2_000):
+                snapshot = bank.snapshot()
+                result = bank.reduce(expr, "USD", version=snapshot.version)
+                expected = 1_000 // snapshot.rate("CHF", "USD") + 1
+                if Money.dollar(expected) != result:
+                    mismatches.append(result)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for rate in range(2, 200):
+            bank.add_rate("CHF", "USD", rate)
+        for reader in readers:
+            reader.join()
+        assert [] == mismatches
+
+
+class TestMoneyInterning:
+    """Money 인턴 테이블"""
+
+    @pytest.fixture(autouse=True)
+    def interner(self):
+        yield enable_interning(maxsize=2)
+        disable_interning()
+
+    def test_equal_values_share_instance(self):
+        assert Money.dollar(5) is Money.dollar(5)
+        assert Money.dollar(10) is Money.dollar(5).times(2)
+        assert Money.dollar(5) is not Money.franc(5)
+
+    def test_reduce_returns_interned(self):
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        assert Money.dollar(5) is bank.reduce(Money.franc(10), "USD")
+
+    def test_table_is_bounded(self, interner):
+        five = Money.dollar(5)
+        Money.dollar(6)
+        Money.dollar(7)
+        assert 2 == len(interner)
+        assert five is not Money.dollar(5)
+        assert five == Money.dollar(5)
+
+    def test_disabled(self):
+        disable_interning()
+        assert Money.dollar(5) is not Money.dollar(5)
+
+
+class TestReduceMany:
+    """프로세스 풀로 여러 Expression 축소"""
+
+    def setup_method(self):
+        self.bank = Bank()
+        self.bank.add_rate("CHF", "USD", 2)
+        self.expressions = [
+            Money.dollar(amount).plus(Money.franc(amount * 2)) for amount in range(50)
+        ]
+
+    def test_reduce_many_in_order(self):
+        results = self.bank.reduce_many(self.expressions, "USD", workers=2, chunksize=8)
+        assert [Money.dollar(amount * 2) for amount in range(50)] == results
+
+    def test_reduce_many_single_worker(self):
+        results = self.bank.reduce_many(self.expressions, "USD", workers=1)
+        assert [self.bank.reduce(expr, "USD") for expr in self.expressions] == results
+
+    def test_reduce_many_deep_chain(self):
+        """깊은 트리도 재귀 없이 워커로 보낸다"""
+        chain = Money.dollar(0)
+        for _ in range(100_000):
+            chain = chain.plus(Money.franc(4))
+        results = self.bank.reduce_many([chain, Money.franc(4)], "USD", workers=2)
+        assert [Money.dollar(200_000), Money.dollar(2)] == results
+
+    def test_reduce_many_unserializable_chunk(self):
+        """직렬화할 수 없는 노드가 든 묶음은 pickle로 보낸다"""
+        expressions = [compile(expr) for expr in self.expressions[:5]]
+        results = self.bank.reduce_many(expressions, "USD", workers=2)
+        assert [Money.dollar(amount * 2) for amount in range(5)] == results
+
+    def test_money_pickles_compactly(self):
+        assert Money.franc(7) == pickle.loads(pickle.dumps(Money.franc(7)))
+        assert (Money, (7, "CHF")) == Money.franc(7).__reduce__()
+
+    def test_reduce_many_bounded_window(self):
+        """묶음이 워커 수의 두 배보다 많아도 순서대로 모두 돌려준다"""
+        results = self.bank.reduce_many(self.expressions, "USD", workers=2, chunksize=3)
+        assert [Money.dollar(amount * 2) for amount in range(50)] == results
+
+
+class TestFixedPoint:
+    """고정 소수점 금액과 반올림 모드"""
+
+    @pytest.mark.parametrize(
+        "rounding, expected",
+        [
+            (ROUND_FLOOR, [2, -3, 2, -3, 2, -3]),
+            (ROUND_CEILING, [3, -2, 3, -2, 3, -2]),
+            (ROUND_DOWN, [2, -2, 2, -2, 2, -2]),
+            (ROUND_UP, [3, -3, 3, -3, 3, -3]),
+            (ROUND_HALF_UP, [3, -3, 2, -2, 3, -3]),
+            (ROUND_HALF_EVEN, [2, -2, 2, -2, 3, -3]),
+        ],
+    )
+    def test_divide(self, rounding, expected):
+        """5/2, -5/2, 9/4, -9/4, 11/4, -11/4"""
+        cases = [(5, 2), (-5, 2), (9, 4), (-9, 4), (11, 4), (-11, 4)]
+        assert expected == [divide(a, r, rounding) for a, r in cases]
+
+    def test_divide_exact(self):
+        for rounding in ROUNDING_MODES:
+            assert -3 == divide(-6, 2, rounding)
+
+    def test_bank_rounding(self):
+        """5 CHF + 5 CHF, 환율 2:1 - 반올림 모드에 따라 Money마다 반올림"""
+        expr = Money.franc(5).plus(Money.franc(5))
+        floor_bank = Bank()
+        floor_bank.add_rate("CHF", "USD", 2)
+        half_up_bank = Bank(rounding=ROUND_HALF_UP)
+        half_up_bank.add_rate("CHF", "USD", 2)
+        assert Money.dollar(4) == floor_bank.reduce(expr, "USD")
+        assert Money.dollar(6) == half_up_bank.reduce(expr, "USD")
+        assert Money.dollar(3) == half_up_bank.reduce(Money.franc(5), "USD")
+
+    def test_unknown_rounding(self):
+        with pytest.raises(ValueError):
+            Bank(rounding="nearest")
+
+    def test_parse(self):
+        assert Money.dollar(1234) == Money.parse("12.34", "USD")
+        assert Money.dollar(-50) == Money.parse("-0.5", "USD")
+        assert Money(1000, "KRW") == Money.parse("1000", "KRW")
+        assert Money.dollar(100) == Money.parse("1.005", "USD")
+        assert Money.dollar(101) == Money.parse("1.005", "USD", ROUND_HALF_UP)
+
+    def test_parse_accepts_bare_parts(self):
+        assert Money.dollar(50) == Money.parse(".5", "USD")
+        assert Money.dollar(500) == Money.parse(" +5. ", "USD")
+
+    @pytest.mark.parametrize(
+        "text",
+        ["1.2_3", "1_000", "1.-5", "1.+5", "--1", "1.2.3", "", ".", "-", "١٢", "1e3"],
+    )
+    def test_parse_rejects_malformed(self, text):
+        with pytest.raises(ValueError):
+            Money.parse(text, "USD")
+
+    def test_format(self):
+        assert "12.34 USD" == Money.dollar(1234).format()
+        assert "-0.05 CHF" == Money.franc(-5).format()
+        assert "1000 KRW" == Money(1000, "KRW").format()
+
+
+class TestReduceToAll:
+    """여러 도착 통화로 한 번에 축소"""
+
+    def setup_method(self):
+        self.bank = Bank()
+        self.bank.add_rate("CHF", "USD", 2)
+        self.bank.add_rate("USD", "EUR", 1)
+        self.bank.add_rate("EUR", "CHF", 3)
+        self.expr = Sum(Money.dollar(5), Money.franc(11)).plus(Money.franc(3))
+
+    def test_matches_reduce(self):
+        targets = ["USD", "EUR", "CHF"]
+        results = self.bank.reduce_to_all(self.expr, targets)
+        assert targets == list(results)
+        for target in targets:
+            assert self.bank.reduce(self.expr, target) == results[target]
+
+    def test_same_version(self):
+        version = self.bank.version
+        self.bank.add_rate("CHF", "USD", 1)
+        results = self.bank.reduce_to_all(self.expr, ["USD"], version=version)
+        assert Money.dollar(11) == results["USD"]
+
+    def test_missing_rate(self):
+        with pytest.raises(KeyError):
+            self.bank.reduce_to_all(self.expr, ["USD", "JPY"])
+
+
+class TestReduceAmount:
+    """내부 축소 경로 - 금액만 주고받고 Money는 경계에서만 만든다"""
+
+    def expressions(self):
+        tree = Sum(Money.dollar(5), Money.franc(11)).plus(Money.franc(3))
+        return [
+            Money.franc(7),
+            tree,
+            MoneyBatch([5, 11, 3], ["USD", "CHF", "CHF"]),
+            compile(tree),
+            Dag(tree),
+        ]
+
+    def test_matches_reduce(self):
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        for expr in self.expressions():
+            assert bank.reduce(expr, "USD")._amount == expr._reduce_amount(bank, "USD")
+
+    @pytest.mark.parametrize("rounding", ROUNDING_MODES)
+    def test_two_leaf_sum_matches_buckets(self, rounding):
+        """잎 두 개짜리 Sum의 빠른 경로도 버킷 경로와 같은 값을 낸다"""
+        bank = Bank(rounding=rounding)
+        bank.add_rate("CHF", "USD", 4)
+        for augend, addend in [
+            (Money.franc(6), Money.franc(-6)),
+            (Money.dollar(5), Money.franc(10)),
+            (Money.franc(2), Money.franc(2)),
+        ]:
+            buckets = collect_buckets(Sum(augend, addend))
+            rates = {currency: bank.rate(currency, "USD") for currency in buckets}
+            expected = convert_buckets(buckets, rates, rounding)
+            assert expected == Sum(augend, addend)._reduce_amount(bank, "USD")
+
+    def test_no_intermediate_money(self, monkeypatch):
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        expressions = self.expressions()
+
+        def fail(amount, currency):
+            raise AssertionError("중간 Money가 만들어졌습니다")
+
+        monkeypatch.setattr(Money, "of", staticmethod(fail))
+        assert [3, 11, 11, 11, 11] == [
+            expr._reduce_amount(bank, "USD") for expr in expressions
+        ]
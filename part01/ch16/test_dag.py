@@ -0,0 +1,161 @@
+import pickle
+
+from part01.ch16.batch import MoneyBatch
+from part01.ch16.currency import Bank, Money, Sum, collect_buckets
+from part01.ch16.dag import Dag, dedup
+from part01.ch16.matrix import MatrixBank, PinnedMatrixBank
+
+
+def fee_schedule():
+    """계좌마다 반복되는 수수료 표"""
+    return Sum(Money.franc(3), Money.dollar(1)).plus(Money.franc(7))
+
+
+def portfolio(accounts):
+    expr = fee_schedule()
+    for account in range(accounts):
+        expr = expr.plus(Sum(fee_schedule(), Money.franc(account % 3)))
+    return expr
+
+
+class CountingMoney(Money):
+    """축소 호출 수를 세는 Money"""
+
+    __slots__ = ()
+    calls = 0
+
+    def _reduce_amount(self, bank, to_currency):
+        CountingMoney.calls += 1
+        return super()._reduce_amount(bank, to_currency)
+
+
+class TestStructuralHash:
+    """Sum의 구조 해시와 동등성"""
+
+    def test_equal_trees(self):
+        assert fee_schedule() == fee_schedule()
+        assert hash(fee_schedule()) == hash(fee_schedule())
+        assert {fee_schedule(): 1}[fee_schedule()] == 1
+
+    def test_different_trees(self):
+        assert fee_schedule() != fee_schedule().plus(Money.franc(0))
+        assert Sum(Money.dollar(1), Money.franc(3)) != Sum(
+            Money.franc(3), Money.dollar(1)
+        )
+        assert Sum(Money.dollar(1), Money.franc(3)) != Money.dollar(1)
+
+    def test_deep_tree(self):
+        """재귀 없이 해시하고 비교한다"""
+        left = Money.dollar(1)
+        right = Money.dollar(1)
+        for amount in range(100_000):
+            left = left.plus(Money.franc(amount))
+            right = right.plus(Money.franc(amount))
+        assert hash(left) == hash(right)
+        assert left == right
+
+    def test_pickle_drops_cached_hash(self):
+        expr = fee_schedule()
+        hash(expr)
+        restored = pickle.loads(pickle.dumps(expr))
+        assert restored._hash is None
+        assert expr == restored
+
+    def test_pickle_deep_shared_tree(self):
+        """펼쳐서 보내므로 깊은 트리도 넘치지 않고 공유도 그대로다"""
+        shared = Money.franc(3).plus(Money.dollar(1))
+        expr = shared
+        for _ in range(100_000):
+            expr = expr.plus(shared)
+        restored = pickle.loads(pickle.dumps(expr))
+        assert restored.addend is restored.augend.addend
+        assert expr == restored
+
+
+class TestDag:
+    """부분 트리를 공유하는 DAG"""
+
+    def test_dedup_shares_subtrees(self):
+        dag = Dag(portfolio(100))
+        # 고유 노드: 잎 6개(3 CHF, $1, 7 CHF, 0/1/2 CHF), 수수료 표 Sum 2개,
+        # 계좌 Sum 3가지, 누적 Sum 100개
+        assert 6 + 2 + 3 + 100 == len(dag)
+        root = dedup(portfolio(3))
+        assert root.augend.augend.addend.augend is root.addend.augend
+
+    def test_reduce_matches_tree(self):
+        expr = portfolio(100)
+        bank = Bank()
+        for rate in (1, 2, 3, 7):
+            bank.add_rate("CHF", "USD", rate)
+            assert bank.reduce(expr, "USD") == bank.reduce(Dag(expr), "USD")
+
+    def test_reduce_visits_unique_leaves_once(self):
+        expr = Money.dollar(0)
+        for _ in range(50):
+            expr = expr.plus(Sum(CountingMoney(3, "CHF"), CountingMoney(1, "USD")))
+        dag = Dag(expr)
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        CountingMoney.calls = 0
+        assert Money.dollar(100) == bank.reduce(dag, "USD")
+        assert 2 == CountingMoney.calls
+        assert Money.dollar(100) == bank.reduce(dag, "USD")
+        assert 2 == CountingMoney.calls
+
+    def test_new_version_recomputes(self):
+        dag = Dag(portfolio(10))
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        before = bank.reduce(dag, "USD")
+        bank.add_rate("CHF", "USD", 1)
+        assert bank.reduce(portfolio(10), "USD") == bank.reduce(dag, "USD")
+        assert before != bank.reduce(dag, "USD")
+
+    def test_non_sum_leaves(self):
+        batch = MoneyBatch([4, 6], ["CHF", "USD"])
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        dag = Dag(Sum(batch, batch).plus(Money.dollar(1)))
+        assert Money.dollar(17) == bank.reduce(dag, "USD")
+        assert Money.dollar(17) == bank.reduce(dag.times(1), "USD")
+        assert Money.dollar(18) == bank.reduce(dag.plus(Money.franc(2)), "USD")
+        assert Money.dollar(5) == bank.reduce(Dag(Money.franc(10)), "USD")
+
+    def test_buckets_count_shared_leaves(self):
+        """공유 부분 트리의 잎은 root에서 닿는 횟수만큼 버킷에 들어간다"""
+        expr = portfolio(20)
+        dag = Dag(Sum(expr, MoneyBatch([4], ["CHF"])))
+        assert collect_buckets(Sum(expr, MoneyBatch([4], ["CHF"]))) == (
+            collect_buckets(dag)
+        )
+
+    def test_reduce_to_all_does_not_expand(self):
+        # 잎 2^40개로 펼쳐지는 DAG - 고유 노드만 도므로 바로 끝난다
+        expr = Money.franc(3)
+        for _ in range(40):
+            expr = Sum(expr, expr)
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        results = bank.reduce_to_all(Dag(expr), ["USD", "CHF"])
+        assert Money.dollar(2**40) == results["USD"]
+        assert Money.franc(3 * 2**40) == results["CHF"]
+
+    def test_reduce_keeps_bank_backend(self):
+        """잎은 호출한 Bank의 통계와 행렬 백엔드를 그대로 쓰는 고정 뷰로 축소한다"""
+        banks = []
+
+        class RecordingMoney(Money):
+            __slots__ = ()
+
+            def _reduce_amount(self, bank, to_currency):
+                banks.append(bank)
+                return super()._reduce_amount(bank, to_currency)
+
+        bank = MatrixBank()
+        bank.add_rate("CHF", "USD", 2)
+        stats = bank.enable_stats()
+        leaf = RecordingMoney(3, "CHF")
+        assert Money.dollar(2) == Dag(Sum(leaf, leaf)).reduce(bank, "USD")
+        assert [PinnedMatrixBank] == [type(pinned) for pinned in banks]
+        assert 1 == stats.rate_hits + stats.rate_misses
@@ -0,0 +1,100 @@
+import pytest
+
+from part01.ch16.currency import Bank, Money
+from part01.ch16.incremental import IncrementalReduction
+
+
+def portfolio():
+    """$5 + 10 CHF + 30 EUR"""
+    return Money.dollar(5).plus(Money.franc(10)).plus(Money(30, "EUR"))
+
+
+class TestIncrementalReduction:
+    """증분 축소 - 환율 변경 구독"""
+
+    def setup_method(self):
+        self.bank = Bank()
+        self.bank.add_rate("CHF", "USD", 2)
+        self.bank.add_rate("EUR", "USD", 3)
+
+    def test_initial_value(self):
+        with IncrementalReduction(portfolio(), self.bank, "USD") as live:
+            assert Money.dollar(20) == live.value()
+
+    def test_follows_rate_change(self):
+        with IncrementalReduction(portfolio(), self.bank, "USD") as live:
+            self.bank.add_rate("CHF", "USD", 5)
+            assert Money.dollar(17) == live.value()
+            assert self.bank.version == live.version
+            assert self.bank.reduce(portfolio(), "USD") == live.value()
+
+    def test_follows_cross_rate_change(self):
+        """EUR이 CHF를 거쳐 환산될 때 CHF→USD 변경도 EUR 소계에 반영된다"""
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        bank.add_rate("EUR", "CHF", 3)
+        with IncrementalReduction(portfolio(), bank, "USD") as live:
+            assert Money.dollar(15) == live.value()
+            bank.add_rate("CHF", "USD", 1)
+            assert Money.dollar(25) == live.value()
+
+    def test_unrelated_rate_change(self):
+        with IncrementalReduction(portfolio(), self.bank, "USD") as live:
+            self.bank.add_rate("KRW", "USD", 1000)
+            assert Money.dollar(20) == live.value()
+
+    def test_close_unsubscribes(self):
+        live = IncrementalReduction(portfolio(), self.bank, "USD")
+        live.close()
+        self.bank.add_rate("CHF", "USD", 5)
+        assert Money.dollar(20) == live.value()
+
+    def test_failing_listener_does_not_skip_others(self, caplog):
+        def broken(snapshot, from_currency, to_currency):
+            raise RuntimeError("boom")
+
+        self.bank.subscribe(broken)
+        with IncrementalReduction(portfolio(), self.bank, "USD") as live:
+            self.bank.add_rate("CHF", "USD", 5)
+            assert Money.dollar(17) == live.value()
+            assert self.bank.version == live.version
+        assert "boom" in caplog.text
+
+    def test_zero_rate_rejected_before_publishing(self):
+        with IncrementalReduction(portfolio(), self.bank, "USD") as live:
+            version = self.bank.version
+            with pytest.raises(ValueError):
+                self.bank.add_rate("CHF", "USD", 0)
+            assert version == self.bank.version
+            assert Money.dollar(20) == live.value()
+
+    def test_missing_rate(self):
+        with pytest.raises(KeyError):
+            IncrementalReduction(Money(1, "KRW"), self.bank, "USD")
+        assert () == self.bank._listeners
+
+    def test_rate_added_while_starting(self):
+        """구독 전에 읽은 스냅샷과 구독 사이에 들어온 환율도 반영한다"""
+        bank = self.bank
+        snapshot = bank.snapshot
+
+        def late_snapshot(version=None):
+            # 스냅샷을 읽은 직후, 그 스냅샷을 반영하기 전에 환율이 바뀐다
+            bank.snapshot = snapshot
+            current = snapshot(version)
+            bank.add_rate("CHF", "USD", 1)
+            return current
+
+        bank.snapshot = late_snapshot
+        with IncrementalReduction(portfolio(), bank, "USD") as live:
+            assert bank.version == live.version
+            assert bank.reduce(portfolio(), "USD") == live.value()
+
+    def test_ignores_stale_versions(self):
+        with IncrementalReduction(portfolio(), self.bank, "USD") as live:
+            old = self.bank.snapshot()
+            self.bank.add_rate("CHF", "USD", 1)
+            value = live.value()
+            live._on_rate(old, "CHF", "USD")
+            assert value == live.value()
+            assert self.bank.version == live.version
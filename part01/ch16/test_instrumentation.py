@@ -0,0 +1,64 @@
+from part01.ch16.currency import Bank, Money, Sum
+from part01.ch16.instrumentation import ReduceStats
+
+
+class TestInstrumentation:
+    """Bank 축소 계측"""
+
+    def setup_method(self):
+        self.bank = Bank()
+        self.bank.add_rate("CHF", "USD", 2)
+        self.expr = Sum(Money.dollar(5), Money.franc(10)).plus(Money.franc(4))
+
+    def test_disabled_by_default(self):
+        assert Money.dollar(12) == self.bank.reduce(self.expr, "USD")
+        assert {} == self.bank.stats()
+
+    def test_reduce_stats(self):
+        self.bank.enable_stats()
+        self.bank.reduce(self.expr, "USD")
+        self.bank.reduce(Money.franc(2), "USD")
+        stats = self.bank.stats()
+        assert 2 == stats["reduce_calls"]
+        assert 6 == stats["nodes_visited"]
+        assert 3.0 == stats["nodes_per_reduce"]
+        assert 2 == sum(stats["latency_us"].values())
+
+    def test_counts_nodes_in_the_reduce_walk(self):
+        """노드 수를 세려고 트리를 한 번 더 돌지 않는다"""
+        visits = []
+
+        class Leaf(Money):
+            __slots__ = ()
+
+            def _accumulate(self, buckets, stack):
+                visits.append(self)
+                super()._accumulate(buckets, stack)
+
+        self.bank.enable_stats()
+        leaf = Leaf(4, "CHF")
+        assert Money.dollar(4) == self.bank.reduce(Sum(leaf, leaf), "USD")
+        assert 2 == len(visits)
+        assert 3 == self.bank.stats()["nodes_visited"]
+
+    def test_rate_hits_and_misses(self):
+        """첫 CHF→USD 조회는 경로 탐색(실패), 이후는 색인 적중"""
+        self.bank.enable_stats()
+        self.bank.reduce(self.expr, "USD")
+        self.bank.reduce(self.expr, "USD")
+        stats = self.bank.stats()
+        assert 1 == stats["rate_misses"]
+        assert 3 == stats["rate_hits"]
+
+    def test_disable(self):
+        self.bank.enable_stats()
+        self.bank.disable_stats()
+        self.bank.reduce(self.expr, "USD")
+        assert {} == self.bank.stats()
+
+    def test_latency_histogram(self):
+        stats = ReduceStats()
+        stats.record_reduce(1, 0.0000005)
+        stats.record_reduce(1, 0.000003)
+        stats.record_reduce(1, 100.0)
+        assert {"<1": 1, "<4": 1, ">=4194304": 1} == stats.snapshot()["latency_us"]
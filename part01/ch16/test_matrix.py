@@ -0,0 +1,100 @@
+import pytest
+
+from part01.ch16.currency import ROUND_HALF_UP, Money
+from part01.ch16.matrix import MatrixBank, PinnedMatrixBank
+
+
+class TestMatrixBank:
+    """환율 행렬과 일괄 환산"""
+
+    def setup_method(self):
+        self.bank = MatrixBank(["USD", "CHF", "EUR"])
+        self.bank.add_rate("CHF", "USD", 2)
+        self.bank.add_rate("EUR", "CHF", 3)
+
+    def test_currency_ids(self):
+        assert [0, 1, 2] == [self.bank.currency_id(c) for c in ("USD", "CHF", "EUR")]
+        self.bank.add_rate("KRW", "USD", 1000)
+        assert 3 == self.bank.currency_id("KRW")
+
+    def test_matrix(self):
+        matrix = self.bank.matrix()
+        assert 2 == matrix.rate(1, 0)
+        assert 6 == matrix.rate(2, 0)
+        assert 1 == matrix.rate(0, 0)
+        with pytest.raises(KeyError):
+            matrix.rate(0, 1)
+
+    def test_matrix_rebuilt_on_new_version(self):
+        first = self.bank.matrix()
+        assert first is self.bank.matrix()
+        self.bank.add_rate("CHF", "USD", 4)
+        assert 4 == self.bank.matrix().rate(1, 0)
+
+    def test_pinned_and_current_keep_their_matrices(self):
+        """옛 버전의 고정 뷰와 현재 Bank가 번갈아 물어도 행렬을 다시 만들지 않는다"""
+        pinned = self.bank.at()
+        old = pinned.matrix()
+        self.bank.add_rate("CHF", "USD", 4)
+        current = self.bank.matrix()
+        for _ in range(3):
+            assert old is pinned.matrix()
+            assert current is self.bank.matrix()
+            assert old is self.bank.at(pinned.version).matrix()
+
+    def test_big_rate(self):
+        """int64를 넘는 환율도 행렬에서 정확히 읽는다"""
+        self.bank.add_rate("VND", "USD", 10**21)
+        vnd = self.bank.currency_id("VND")
+        assert 10**21 == self.bank.rate("VND", "USD")
+        assert 10**21 == self.bank.matrix().rate(vnd, 0)
+        assert Money.dollar(3) == self.bank.reduce(Money(3 * 10**21, "VND"), "USD")
+        assert [0, 5] == list(self.bank.convert_many([9 * 10**18, 10], [vnd, 1], 0))
+
+    def test_rate_reads_matrix(self):
+        assert 6 == self.bank.rate("EUR", "USD")
+        # 행렬의 칸을 바꾸면 rate와 reduce도 그 값을 읽는다
+        self.bank.matrix().cells[2 * 3 + 0] = 12
+        assert 12 == self.bank.rate("EUR", "USD")
+        assert Money.dollar(5) == self.bank.reduce(Money(60, "EUR"), "USD")
+        with pytest.raises(KeyError):
+            self.bank.rate("USD", "CHF")
+        with pytest.raises(KeyError):
+            self.bank.rate("JPY", "USD")
+
+    def test_at_returns_pinned_matrix_bank(self):
+        pinned = self.bank.at()
+        assert isinstance(pinned, PinnedMatrixBank)
+        assert isinstance(pinned, MatrixBank)
+        assert pinned.matrix() is self.bank.matrix()
+        self.bank.add_rate("CHF", "USD", 4)
+        assert 2 == pinned.rate("CHF", "USD")
+        assert [5] == list(pinned.convert_many([10], [1], 0))
+        assert 4 == self.bank.at().rate("CHF", "USD")
+        with pytest.raises(TypeError):
+            pinned.add_rate("CHF", "USD", 5)
+
+    def test_convert_many(self):
+        usd = self.bank.currency_id("USD")
+        result = self.bank.convert_many([5, 10, 60, 7], [0, 1, 2, 1], usd)
+        assert [5, 5, 10, 3] == list(result)
+
+    def test_convert_many_matches_reduce(self):
+        amounts = list(range(100))
+        from_ids = [amount % 3 for amount in amounts]
+        codes = self.bank.currencies()
+        result = self.bank.convert_many(amounts, from_ids, 0)
+        expected = [
+            self.bank.reduce(Money(a, codes[i]), "USD")
+            for a, i in zip(amounts, from_ids, strict=True)
+        ]
+        assert expected == [Money.dollar(amount) for amount in result]
+
+    def test_convert_many_rounding(self):
+        bank = MatrixBank(["USD", "CHF"], rounding=ROUND_HALF_UP)
+        bank.add_rate("CHF", "USD", 2)
+        assert [3, 2] == list(bank.convert_many([5, 3], [1, 1], 0))
+
+    def test_convert_many_missing_rate(self):
+        with pytest.raises(KeyError):
+            self.bank.convert_many([5], [0], self.bank.currency_id("CHF"))
@@ -0,0 +1,106 @@
+import pickle
+
+import pytest
+
+from part01.ch16.currency import Bank, MappedSnapshot, Money, RateSnapshot, Sum
+from part01.ch16.ratefile import RateFile
+
+
+@pytest.fixture
+def bank():
+    bank = Bank()
+    bank.add_rate("CHF", "USD", 2)
+    bank.add_rate("USD", "EUR", 3)
+    bank.add_rate("GBP", "EUR", 5)
+    return bank
+
+
+@pytest.fixture
+def path(tmp_path, bank):
+    path = tmp_path / "rates.bin"
+    bank.save_snapshot(path)
+    return path
+
+
+class TestRateFile:
+    """환율 스냅샷 파일"""
+
+    def test_layout(self, path):
+        rate_file = RateFile(path)
+        assert 3 == rate_file.version
+        assert ["CHF", "EUR", "GBP", "USD"] == rate_file.codes
+        assert 2 == rate_file.direct[0 * 4 + 3]
+        assert 0 == rate_file.direct[0 * 4 + 1]
+        assert 6 == rate_file.resolved[0 * 4 + 1]
+
+    def test_open_snapshot(self, bank, path):
+        opened = Bank.open_snapshot(path)
+        assert isinstance(opened.snapshot(), MappedSnapshot)
+        assert bank.version == opened.version
+        assert 6 == opened.rate("CHF", "EUR")
+        assert 1 == opened.rate("JPY", "JPY")
+        assert bank.snapshot().rates() == opened.snapshot().rates()
+        expr = Sum(Money.dollar(5), Money.franc(10)).plus(Money(3, "GBP"))
+        assert bank.reduce(expr, "EUR") == opened.reduce(expr, "EUR")
+
+    def test_missing_rate(self, path):
+        opened = Bank.open_snapshot(path)
+        with pytest.raises(KeyError):
+            opened.rate("EUR", "USD")
+        with pytest.raises(KeyError):
+            opened.rate("JPY", "USD")
+
+    def test_add_rate_copies_on_write(self, path):
+        opened = Bank.open_snapshot(path)
+        opened.add_rate("EUR", "JPY", 100)
+        assert type(opened.snapshot()) is RateSnapshot
+        assert 4 == opened.version
+        assert 600 == opened.rate("CHF", "JPY")
+        assert isinstance(opened.snapshot(3), MappedSnapshot)
+        assert ["CHF", "EUR", "GBP", "USD"] == RateFile(path).codes
+
+    def test_pickle_reopens_file(self, path):
+        snapshot = pickle.loads(pickle.dumps(MappedSnapshot.open(path)))
+        assert isinstance(snapshot, MappedSnapshot)
+        assert 6 == snapshot.rate("CHF", "EUR")
+
+    def test_pickle_rejects_replaced_file(self, bank, path):
+        """pickle한 뒤 save_snapshot이 파일을 바꿨으면 다른 버전을 열지 않는다"""
+        data = pickle.dumps(MappedSnapshot.open(path))
+        bank.add_rate("CHF", "USD", 4)
+        bank.save_snapshot(path)
+        with pytest.raises(ValueError):
+            pickle.loads(data)
+
+    def test_reduce_many_with_mapped_snapshot(self, path):
+        opened = Bank.open_snapshot(path)
+        expressions = [Money.franc(amount) for amount in range(10)]
+        assert [Money(amount // 6, "EUR") for amount in range(10)] == (
+            opened.reduce_many(expressions, "EUR", workers=2, chunksize=4)
+        )
+
+    def test_save_mapped_snapshot(self, tmp_path, path):
+        copy = tmp_path / "copy.bin"
+        Bank.open_snapshot(path).save_snapshot(copy)
+        assert path.read_bytes() == copy.read_bytes()
+
+    def test_invalid_file(self, tmp_path, path):
+        empty = tmp_path / "empty.bin"
+        empty.touch()
+        with pytest.raises(ValueError):
+            RateFile(empty)
+        truncated = tmp_path / "truncated.bin"
+        truncated.write_bytes(path.read_bytes()[:-8])
+        with pytest.raises(ValueError):
+            RateFile(truncated)
+        garbage = tmp_path / "garbage.bin"
+        garbage.write_bytes(b"x" * 64)
+        with pytest.raises(ValueError):
+            RateFile(garbage)
+
+    def test_rate_out_of_int64_range(self, tmp_path):
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2**40)
+        bank.add_rate("USD", "EUR", 2**40)
+        with pytest.raises(ValueError):
+            bank.save_snapshot(tmp_path / "rates.bin")
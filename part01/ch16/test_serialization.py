@@ -0,0 +1,128 @@
+import pickle
+import sys
+from array import array
+
+import pytest
+
+from part01.ch16.batch import MoneyBatch
+from part01.ch16.compiler import compile
+from part01.ch16.currency import Bank, Money, Sum
+from part01.ch16.serialization import dumps, loads
+
+
+def rows(expr):
+    """트리 모양과 잎 값을 비교하기 위한 후위 순회 목록"""
+    out = []
+    stack = [(expr, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if isinstance(node, Sum):
+            if expanded:
+                out.append("+")
+            else:
+                stack += [(node, True), (node.addend, False), (node.augend, False)]
+        elif isinstance(node, MoneyBatch):
+            out.append(("batch", list(node), node.currencies()))
+        else:
+            out.append(node)
+    return out
+
+
+class TestSerialization:
+    """Expression 이진 직렬화"""
+
+    def test_money_round_trip(self):
+        assert Money.dollar(5) == loads(dumps(Money.dollar(5)))
+        assert Money.franc(-7) == loads(dumps(Money.franc(-7)))
+
+    def test_sum_round_trip(self):
+        expr = Sum(Money.dollar(5), Money.franc(10)).times(2).plus(Money.dollar(1))
+        assert rows(expr) == rows(loads(dumps(expr)))
+
+    def test_batch_round_trip(self):
+        batch = MoneyBatch([5, -10, 3], ["CHF", "EUR", "CHF"])
+        expr = Money.dollar(1).plus(batch)
+        restored = loads(dumps(expr))
+        assert rows(expr) == rows(restored)
+        assert ["CHF", "EUR"] == restored.addend.currencies()
+
+    def test_batches_keep_own_code_order(self):
+        """배치 열은 배치 통화 목록 기준 인덱스를 그대로 싣는다"""
+        first = MoneyBatch([1, 2], ["EUR", "USD"])
+        second = MoneyBatch([3, 4, 5], ["USD", "CHF", "EUR"])
+        expr = Money.franc(7).plus(first).plus(second)
+        restored = loads(dumps(expr))
+        assert rows(expr) == rows(restored)
+        assert ["USD", "CHF", "EUR"] == restored.addend.currencies()
+
+    def test_big_amount_round_trip(self):
+        expr = Money.dollar(2**70).plus(Money.dollar(-(2**64)))
+        assert rows(expr) == rows(loads(dumps(expr)))
+
+    def test_big_batch_rows_round_trip(self):
+        batch = MoneyBatch([5, 2**70, -(2**64), 3], ["CHF", "EUR", "CHF", "EUR"])
+        expr = MoneyBatch.of([2**65], "USD").plus(Money.dollar(1)).plus(batch)
+        restored = loads(dumps(expr))
+        assert rows(expr) == rows(restored)
+        assert {1: 2**70, 2: -(2**64)} == restored.addend._bigs
+
+    def test_deep_tree(self):
+        bank = Bank()
+        bank.add_rate("CHF", "USD", 2)
+        expr = Money.dollar(1)
+        for _ in range(100_000):
+            expr = expr.plus(Money.franc(2))
+        restored = loads(memoryview(dumps(expr)))
+        assert bank.reduce(expr, "USD") == bank.reduce(restored, "USD")
+
+    def test_smaller_than_pickle(self):
+        expr = Money.dollar(0)
+        for amount in range(200):
+            expr = expr.plus(Money(amount, ("USD", "CHF")[amount % 2]))
+        # Money는 __reduce__로 작게 pickle되지만 열 형식이 여전히 더 작다
+        assert len(dumps(expr)) < len(pickle.dumps(expr))
+
+    def test_bad_data(self):
+        with pytest.raises(ValueError):
+            loads(b"nope")
+        with pytest.raises(ValueError):
+            loads(dumps(Money.dollar(5))[:-3])
+
+    def test_corrupt_data_raises_value_error(self):
+        """어느 바이트가 깨지거나 잘려도 IndexError/StopIteration 대신 ValueError"""
+        batch = MoneyBatch([1, 2**70, 3], ["USD", "CHF", "USD"])
+        expr = Sum(Money(2**80, "EUR"), batch).plus(Money.franc(4))
+        data = dumps(expr)
+        for position in range(4, len(data)):
+            for value in (0x00, 0x01, 0x04, 0x7F, 0xFF):
+                corrupt = bytearray(data)
+                corrupt[position] = value
+                try:
+                    loads(corrupt)
+                except ValueError:
+                    pass
+            with pytest.raises(ValueError):
+                loads(data[:position])
+
+    @pytest.mark.parametrize(
+        "sizes, bigs, rows",
+        [
+            (b"\x00", b"\x00", 2),  # 읽지 않은 잎 행
+            (b"\x01\x05", b"\x00", 1),  # 읽지 않은 sizes
+            (b"\x00", b"\x01\x02", 1),  # 읽지 않은 bigs
+        ],
+    )
+    @pytest.mark.skipif(sys.byteorder == "big", reason="리틀 엔디언 열을 직접 쓴다")
+    def test_leftover_data(self, sizes, bigs, rows):
+        """Money 하나의 ops 뒤에 쓰이지 않은 칸이 남으면 ValueError"""
+        head = b"MNY1\x01\x03USD\x01\x00" + sizes + bigs + bytes([rows])
+        head += bytes(-len(head) % 8)
+        data = (
+            head + array("q", [1] * rows).tobytes() + array("I", [0] * rows).tobytes()
+        )
+        with pytest.raises(ValueError):
+            loads(data)
+
+    def test_unsupported_node(self):
+        with pytest.raises(TypeError):
+            dumps(compile(Money.dollar(5)))
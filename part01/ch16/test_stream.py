@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from part01.ch16.currency import Bank, Money
+from part01.ch16.stream import RunningTotals, read_batches, reduce_file
+
+RECORDS = [(amount, ("USD", "CHF", "EUR")[amount % 3]) for amount in range(1, 200)]
+
+
+def expected_total(bank, to_currency):
+    expr = Money(*RECORDS[0])
+    for amount, currency in RECORDS[1:]:
+        expr = expr.plus(Money(amount, currency))
+    return bank.reduce(expr, to_currency)
+
+
+@pytest.fixture
+def bank():
+    bank = Bank()
+    bank.add_rate("CHF", "USD", 2)
+    bank.add_rate("EUR", "USD", 3)
+    return bank
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "positions.csv"
+    lines = ["amount,currency"] + [f"{a},{c}" for a, c in RECORDS]
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+@pytest.fixture
+def jsonl_path(tmp_path):
+    path = tmp_path / "positions.jsonl"
+    lines = [json.dumps({"amount": a, "currency": c}) for a, c in RECORDS]
+    path.write_text("\n".join(lines))
+    return path
+
+
+class TestStream:
+    """CSV/JSONL 스트리밍 축소"""
+
+    def test_read_batches_in_blocks(self, csv_path):
+        batches = list(read_batches(csv_path, block_size=64))
+        assert len(batches) > 1
+        rows = [(money._amount, money.currency()) for b in batches for money in b]
+        assert RECORDS == rows
+
+    def test_reduce_csv(self, csv_path, bank):
+        assert expected_total(bank, "USD") == reduce_file(csv_path, bank, "USD")
+
+    def test_reduce_jsonl(self, jsonl_path, bank):
+        result = reduce_file(jsonl_path, bank, "USD", block_size=100)
+        assert expected_total(bank, "USD") == result
+
+    @pytest.mark.parametrize("amount", [12.99, "1299", True, None])
+    def test_jsonl_rejects_non_int_amount(self, tmp_path, bank, amount):
+        path = tmp_path / "bad.jsonl"
+        path.write_text(json.dumps({"amount": amount, "currency": "USD"}) + "\n")
+        with pytest.raises(ValueError):
+            reduce_file(path, bank, "USD")
+
+    @pytest.mark.parametrize("currency", [1, None, ["USD"]])
+    def test_jsonl_rejects_non_str_currency(self, tmp_path, bank, currency):
+        path = tmp_path / "bad.jsonl"
+        path.write_text(json.dumps({"amount": 5, "currency": currency}) + "\n")
+        with pytest.raises(ValueError):
+            reduce_file(path, bank, "USD")
+
+    @pytest.mark.parametrize("line", ["12USD", "12,", "12, ", "12.5,USD"])
+    def test_csv_rejects_malformed_line(self, tmp_path, bank, line):
+        path = tmp_path / "bad.csv"
+        path.write_text(f"amount,currency\n5,USD\n{line}\n")
+        with pytest.raises(ValueError):
+            reduce_file(path, bank, "USD")
+
+    def test_csv_skips_blank_lines(self, tmp_path, bank):
+        path = tmp_path / "blank.csv"
+        path.write_text("amount,currency\n5,USD\n\n  \r\n4,CHF\n")
+        assert Money.dollar(7) == reduce_file(path, bank, "USD")
+
+    def test_line_longer_than_block(self, csv_path, bank):
+        result = reduce_file(csv_path, bank, "USD", block_size=3)
+        assert expected_total(bank, "USD") == result
+
+    def test_running_totals(self, csv_path):
+        totals = RunningTotals()
+        for batch in read_batches(csv_path, block_size=128):
+            totals.add(batch)
+        assert len(RECORDS) == totals.count
+        assert sum(a for a, c in RECORDS if c == "CHF") == totals.totals()["CHF"]
+        with pytest.raises(ValueError):
+            totals.value()
+
+    def test_empty_file(self, tmp_path, bank):
+        path = tmp_path / "empty.csv"
+        path.write_text("")
+        assert Money.dollar(0) == reduce_file(path, bank, "USD")
@@ -1,5 +1,7 @@
 # Money 클래스 - 다중 통화 지원
 class Money:
+    __slots__ = ("_amount", "_currency")
+
     def __init__(self, amount, currency):
         self._amount = amount
         self._currency = currency
@@ -0,0 +1,122 @@
+from array import array
+
+from part01.currency import Money
+
+INT64_MAX = 2**63 - 1
+
+
+# int64 열과 int64를 넘는 행 {행: 금액} - 넘는 행의 열 칸은 0으로 둔다
+def _pack(values):
+    try:
+        return array("q", values), {}
+    except OverflowError:
+        pass
+    amounts = array("q", bytes(8 * len(values)))
+    bigs = {}
+    for row, amount in enumerate(values):
+        if -INT64_MAX - 1 <= amount <= INT64_MAX:
+            amounts[row] = amount
+        else:
+            bigs[row] = amount
+    return amounts, bigs
+
+
+# Ledger 클래스 - 같은 통화끼리 금액을 모아 두는 장부
+# 통화마다 금액을 int64 배열 하나에 담아 Money를 하나씩 더하지 않고 한꺼번에 계산한다
+# int64를 넘는 금액은 그 행만 _bigs에 정확한 정수로 따로 둔다
+class Ledger:
+    def __init__(self, entries=()):
+        self._columns = {}
+        self._bigs = {}
+        self.extend(entries)
+
+    def __len__(self):
+        return sum(len(column) for column in self._columns.values())
+
+    def _column(self, currency):
+        column = self._columns.get(currency)
+        if column is None:
+            column = self._columns[currency] = array("q")
+            self._bigs[currency] = {}
+        return column
+
+    def _append(self, currency, amounts):
+        column = self._column(currency)
+        packed, bigs = _pack(amounts)
+        bigs_of_currency = self._bigs[currency]
+        for row, amount in bigs.items():
+            bigs_of_currency[len(column) + row] = amount
+        column.extend(packed)
+
+    # 행마다 정확한 금액
+    def _exact(self, currency):
+        column = self._columns[currency]
+        bigs = self._bigs[currency]
+        if not bigs:
+            return column
+        amounts = column.tolist()
+        for row, amount in bigs.items():
+            amounts[row] = amount
+        return amounts
+
+    # 배치 추가 - 통화 검사는 항목마다가 아니라 배치마다 한 번 한다
+    def extend(self, entries, currency=None):
+        entries = list(entries)
+        amounts = [entry.amount() for entry in entries]
+        currencies = [entry.currency() for entry in entries]
+        kinds = set(currencies)
+        if currency is not None and kinds - {currency}:
+            raise ValueError("통화가 다른 경우 더할 수 없습니다")
+        if len(kinds) == 1:
+            self._append(currencies[0], amounts)
+            return
+        groups = {}
+        for amount, kind in zip(amounts, currencies, strict=True):
+            groups.setdefault(kind, []).append(amount)
+        for kind, group in groups.items():
+            self._append(kind, group)
+
+    def add(self, money):
+        self._append(money.currency(), [money.amount()])
+
+    def currencies(self):
+        return list(self._columns)
+
+    # 통화별 합계
+    def total(self, currency):
+        column = self._columns.get(currency, ())
+        bigs = self._bigs.get(currency, {})
+        return Money(sum(column) + sum(bigs.values()), currency)
+
+    # 장부 전체 합계 - 통화가 하나일 때만 더할 수 있다
+    def sum(self):
+        if len(self._columns) != 1:
+            raise ValueError("통화가 다른 경우 더할 수 없습니다")
+        (currency,) = self._columns
+        return self.total(currency)
+
+    # 모든 금액에 같은 수를 곱한 새 장부
+    # 열의 최댓값/최솟값으로 넘침을 한 번에 확인하고, 넘칠 때만 행마다 확인한다
+    def times_all(self, multiplier):
+        ledger = Ledger()
+        for currency, column in self._columns.items():
+            bigs = self._bigs[currency]
+            if not bigs and column:
+                bound = max(-min(column), max(column)) * abs(multiplier)
+                if bound <= INT64_MAX:
+                    products = array("q", [amount * multiplier for amount in column])
+                    ledger._columns[currency] = products
+                    ledger._bigs[currency] = {}
+                    continue
+            products = [amount * multiplier for amount in self._exact(currency)]
+            ledger._append(currency, products)
+        return ledger
+
+    # 통화별 합계 - {통화: Money}
+    def group_by_currency(self):
+        return {currency: self.total(currency) for currency in self._columns}
+
+    def __iter__(self):
+        for currency in self._columns:
+            for amount in self._exact(currency):
+                yield Money(amount, currency)
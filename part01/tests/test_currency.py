@@ -50,3 +50,7 @@ class TestMoney:
 
         ten_thousand_won = won(10000)
         assert "10000 KRW" == repr(ten_thousand_won)
+
+    # __slots__ 테스트
+    def test_compact_instance(self):
+        assert not hasattr(dollar(5), "__dict__")
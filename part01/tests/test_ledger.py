@@ -0,0 +1,78 @@
+import pytest
+
+from part01.currency import dollar, won
+from part01.ledger import Ledger
+
+
+class TestLedger:
+    # 통화별 합계 테스트
+    def test_total(self):
+        ledger = Ledger([dollar(5), won(1000), dollar(10)])
+        assert dollar(15) == ledger.total("USD")
+        assert won(1000) == ledger.total("KRW")
+        assert 3 == len(ledger)
+
+    # 없는 통화 합계 테스트
+    def test_total_empty(self):
+        assert won(0) == Ledger().total("KRW")
+
+    # 같은 통화 배치 테스트
+    def test_single_currency_batch(self):
+        ledger = Ledger(won(i) for i in range(1000))
+        assert ["KRW"] == ledger.currencies()
+        assert won(499500) == ledger.sum()
+
+    # 배치 통화 검사 테스트 - 실패한 배치는 하나도 들어가지 않는다
+    def test_extend_mismatch(self):
+        ledger = Ledger([dollar(5)])
+        with pytest.raises(ValueError, match="통화가 다른 경우 더할 수 없습니다"):
+            ledger.extend([dollar(1), won(5000)], currency="USD")
+        assert dollar(5) == ledger.sum()
+
+    # 여러 통화 합계 테스트 (실패해야 함)
+    def test_sum_mixed_currency(self):
+        with pytest.raises(ValueError, match="통화가 다른 경우 더할 수 없습니다"):
+            Ledger([dollar(5), won(5000)]).sum()
+
+    # 일괄 곱셈 테스트
+    def test_times_all(self):
+        ledger = Ledger([dollar(5), won(1000), dollar(10)])
+        doubled = ledger.times_all(2)
+        assert dollar(30) == doubled.total("USD")
+        assert won(2000) == doubled.total("KRW")
+        assert dollar(15) == ledger.total("USD")
+
+    # 통화별 묶음 테스트
+    def test_group_by_currency(self):
+        ledger = Ledger([dollar(5), won(1000), dollar(10)])
+        ledger.add(won(500))
+        assert {"USD": dollar(15), "KRW": won(1500)} == ledger.group_by_currency()
+
+    # 순회 테스트
+    def test_iter(self):
+        entries = [dollar(5), dollar(10), won(1000)]
+        assert entries == list(Ledger(entries))
+
+
+class TestLedgerOverflow:
+    # int64를 넘는 금액 테스트 - 그 행만 따로 담고 합계는 정확하다
+    def test_big_amount(self):
+        ledger = Ledger([dollar(2**63), dollar(5), won(-(2**64))])
+        ledger.add(dollar(2**70))
+        assert dollar(2**63 + 5 + 2**70) == ledger.total("USD")
+        assert won(-(2**64)) == ledger.total("KRW")
+        assert [dollar(2**63), dollar(5), dollar(2**70), won(-(2**64))] == list(ledger)
+
+    # 넘치지 않는 곱셈 테스트
+    def test_times_all_fast_path(self):
+        ledger = Ledger([dollar(2**31), dollar(-(2**31))]).times_all(2**31)
+        assert [dollar(2**62), dollar(-(2**62))] == list(ledger)
+        assert {} == ledger._bigs["USD"]
+
+    # 넘치는 곱셈 테스트 - 넘친 행만 옮겨 간다
+    def test_times_all_overflow(self):
+        ledger = Ledger([dollar(1), dollar(2**40), won(3)]).times_all(2**30)
+        assert {1: 2**70} == ledger._bigs["USD"]
+        assert dollar(2**30 + 2**70) == ledger.total("USD")
+        assert won(3 * 2**30) == ledger.total("KRW")
+        assert [dollar(0), dollar(0), won(0)] == list(ledger.times_all(0))